@@ -0,0 +1,65 @@
+"""
+Ranking and unranking of bordered and unbordered words.
+
+The rankers and the public functions are imported on first access (PEP 562), so
+`import rank_unrank` is cheap and a command line call loads only the algorithm
+it uses.
+"""
+
+import importlib
+
+# --alg name -> (module, class) of the ranker
+RANKERS = {
+    "base": ("rank_unrank.base", "BaseRankerUnranker"),
+    "ub": ("rank_unrank.rank_ub", "UBRankerUnranker"),
+    "fast": ("rank_unrank.rank_fast", "FasterRankerUnranker"),
+}
+
+_LAZY = {
+    "BaseRankerUnranker": "rank_unrank.base",
+    "UBRankerUnranker": "rank_unrank.rank_ub",
+    "FasterRankerUnranker": "rank_unrank.rank_fast",
+    "approx_rank": "rank_unrank.rank_approx",
+    "count_completions": "rank_unrank.rank_fast",
+    "count_table": "rank_unrank.tables",
+    "is_bordered": "rank_unrank.texts",
+    "sample": "rank_unrank.sampling",
+}
+
+_SUBMODULES = {
+    "base",
+    "batch",
+    "client",
+    "corpus",
+    "instrument",
+    "modular",
+    "parallel",
+    "rank_approx",
+    "rank_fast",
+    "rank_fast_subproblems",
+    "rank_ub",
+    "sampling",
+    "server",
+    "tables",
+    "texts",
+    "texts_numpy",
+    "tool",
+}
+
+
+def ranker_class(alg: str) -> type:
+    """the ranker class of the algorithm, importing only its module"""
+    module, name = RANKERS[alg]
+    return getattr(importlib.import_module(module), name)
+
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name]), name)
+    if name in _SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | _LAZY.keys() | _SUBMODULES)
@@ -1,4 +1,5 @@
 import itertools
+from typing import Iterable, Iterator, Sequence
 from rank_unrank.texts import is_bordered
 
 
@@ -19,6 +20,79 @@ class SeqGenerator:
                 return seq
 
 
+class PrunedSeqGenerator:
+    """Same words as SeqGenerator, visited by a depth-first search over prefixes.
+
+    The prefix function is maintained incrementally along the current path, so the
+    class of all the leaves below a node of depth n-1 is read from its borders.
+    In the second half of the word (2 * len(u) > n) the number of bordered words
+    with a prefix u is given directly by the precalc_B formula of WordTool.B, and
+    subtrees without any word of the requested class are cut off."""
+
+    def __init__(self, n: int, alphabet_size: int, bordered: bool) -> None:
+        self.n = n
+        self.k = alphabet_size
+        self.bordered = bordered
+
+    def __iter__(self) -> Iterator[tuple[int]]:
+        n, k, bordered = self.n, self.k, self.bordered
+        if n == 0:
+            if not bordered:
+                yield ()
+            return
+        pw = [k**e for e in range(n + 1)]
+        seq = [0] * n
+        pi = [0] * n
+        a = [0] * (n + 1)  # a[i] = 1 iff seq[:i] is unbordered
+        horner = [0] * (n + 1)  # horner[i] = sum(a[j] * k**(i-j) for 1 <= j <= i)
+        depth = 0
+        while depth >= 0:
+            if depth == n - 1:
+                # characters extending a border of seq[:n-1] (or the empty border)
+                X = set()
+                if n > 1:
+                    j = pi[n - 2]
+                    X.add(seq[j])
+                    while j > 0:
+                        j = pi[j - 1]
+                        X.add(seq[j])
+                for c in sorted(X) if bordered else range(1, k + 1):
+                    if (c in X) == bordered:
+                        seq[n - 1] = c
+                        yield tuple(seq)
+                c = k + 1
+            else:
+                c = seq[depth] + 1
+            if c > k:
+                seq[depth] = 0
+                depth -= 1
+                continue
+            seq[depth] = c
+            j = 0
+            if depth > 0:
+                j = pi[depth - 1]
+                while j > 0 and seq[j] != c:
+                    j = pi[j - 1]
+                if seq[j] == c:
+                    j += 1
+            pi[depth] = j
+            u_len = depth + 1
+            a[u_len] = int(j == 0)
+            horner[u_len] = horner[u_len - 1] * k + a[u_len]
+            if 2 * u_len > n and u_len < n - 1:
+                # bordered words with a prefix seq[:u_len]: shortest border either
+                # inside the free part, or overlapping a border of seq[:u_len]
+                d = n - u_len
+                count_b = horner[d]
+                while j > 0:
+                    if j + d <= n // 2:
+                        count_b += a[j + d]
+                    j = pi[j - 1]
+                if (count_b if bordered else pw[d] - count_b) == 0:
+                    continue
+            depth += 1
+
+
 class AbstractRankerUnranker:
     def rank(self, seq: list[int], k: int, bordered: bool) -> int:
         raise NotImplementedError()
@@ -26,10 +100,32 @@ class AbstractRankerUnranker:
     def unrank(self, r: int, n: int, k: int, bordered: bool) -> list[int]:
         raise NotImplementedError()
 
+    def rank_many(
+        self, words: Iterable[Sequence[int]], k: int, bordered: bool
+    ) -> list[int]:
+        return [self.rank(w, k, bordered) for w in words]
+
+    def unrank_many(
+        self, ranks: Iterable[int], n: int, k: int, bordered: bool
+    ) -> list[list[int]]:
+        return [self.unrank(r, n, k, bordered) for r in ranks]
+
+    def iter_from(self, r: int, n: int, k: int, bordered: bool) -> Iterator[list[int]]:
+        return itertools.islice(PrunedSeqGenerator(n, k, bordered), r - 1, None)
+
+    def close(self) -> None:
+        """releases the resources of the ranker (worker processes)"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
 
 class BaseRankerUnranker(AbstractRankerUnranker):
     def rank(self, seq: list[int], k: int, bordered: bool) -> int:
-        g = SeqGenerator(len(seq), k, bordered)
+        g = PrunedSeqGenerator(len(seq), k, bordered)
         res = 1
         for s in g:
             if s < seq:
@@ -39,7 +135,7 @@ class BaseRankerUnranker(AbstractRankerUnranker):
         return res
 
     def unrank(self, r: int, n: int, k: int, bordered: bool) -> list[int]:
-        g = SeqGenerator(n, k, bordered)
+        g = PrunedSeqGenerator(n, k, bordered)
         for i, s in enumerate(g, start=1):
             if i == r:
                 return s
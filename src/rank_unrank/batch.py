@@ -0,0 +1,105 @@
+"""
+Streaming rank/unrank of many words, one per line.
+
+Input is consumed in chunks of lines, each chunk ranked (or unranked) as a whole,
+optionally by a pool of processes. At most a few chunks per process are in
+flight at any time, so memory stays bounded however long the input is, and
+results are produced in the order of the input.
+"""
+
+import itertools
+from collections import deque
+from typing import Callable, Iterable, Iterator, Optional
+
+from rank_unrank import ranker_class
+from rank_unrank.texts import is_bordered
+
+CHUNK_SIZE = 256
+
+# chunks submitted ahead of the one being written, per process
+CHUNKS_IN_FLIGHT = 2
+
+
+def parse_seq(s: str) -> tuple[int]:
+    """letters separated by whitespace and/or commas"""
+    return tuple(map(int, s.replace(",", " ").split()))
+
+
+def rank_chunk(lines: list[str], k: int, alg: str) -> list[str]:
+    """ranks of the words (each in its own class), one per line"""
+    ranker = ranker_class(alg)()
+    words = [parse_seq(line) for line in lines]
+    for w in words:
+        if len(w) == 0 or min(w) < 1 or max(w) > k:
+            raise ValueError(f"word {w} has to be non-empty, over letters 1..{k}")
+    classes = [is_bordered(w) for w in words]
+    ranks = {}
+    for bordered in (True, False):
+        group = [w for w, c in zip(words, classes) if c == bordered]
+        ranks[bordered] = iter(ranker.rank_many(group, k, bordered))
+    return [str(next(ranks[c])) for c in classes]
+
+
+def format_approx_rank(
+    w: tuple[int], k: int, bordered: bool, eps: Optional[float] = None
+) -> str:
+    """approximate fraction (rank - 1) / count and log2(rank), see rank_approx"""
+    from rank_unrank.rank_approx import MIN_EPS, approx_rank
+
+    result = approx_rank(w, k, bordered, MIN_EPS if eps is None else eps)
+    return f"{result.fraction!r} {result.log2_rank!r}"
+
+
+def approx_rank_chunk(lines: list[str], k: int, eps: Optional[float]) -> list[str]:
+    """approximate ranks of the words (each in its own class), one per line"""
+    words = [parse_seq(line) for line in lines]
+    for w in words:
+        if len(w) == 0 or min(w) < 1 or max(w) > k:
+            raise ValueError(f"word {w} has to be non-empty, over letters 1..{k}")
+    return [format_approx_rank(w, k, is_bordered(w), eps) for w in words]
+
+
+def unrank_chunk(
+    lines: list[str], n: int, k: int, bordered: bool, alg: str
+) -> list[str]:
+    """words of the given ranks, one per line"""
+    ranker = ranker_class(alg)()
+    words = ranker.unrank_many([int(line) for line in lines], n, k, bordered)
+    return [" ".join(map(str, w)) for w in words]
+
+
+def _chunks(lines: Iterable[str], chunk_size: int) -> Iterator[list[str]]:
+    lines = (line for line in lines if line.strip())
+    while chunk := list(itertools.islice(lines, chunk_size)):
+        yield chunk
+
+
+def process(
+    func: Callable[..., list[str]],
+    lines: Iterable[str],
+    *args,
+    jobs: int = 1,
+    chunk_size: Optional[int] = None,
+) -> Iterator[str]:
+    """output lines of func(chunk, *args) over chunks of the (non-blank) input
+    lines, in the input order"""
+    if chunk_size is None:
+        chunk_size = CHUNK_SIZE
+    if chunk_size < 1:
+        raise ValueError("chunk_size has to be positive")
+    if jobs < 1:
+        raise ValueError("jobs has to be positive")
+    if jobs == 1:
+        for chunk in _chunks(lines, chunk_size):
+            yield from func(chunk, *args)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = deque()
+        for chunk in _chunks(lines, chunk_size):
+            pending.append(executor.submit(func, chunk, *args))
+            if len(pending) >= jobs * CHUNKS_IN_FLIGHT:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+"""
+Ranking of very long words with the default recursion limit.
+
+usage: bench-long.py [length] [alphabet] [random|fib|constant]
+"""
+
+import sys
+import time
+
+from rank_unrank.texts import fib_word, is_bordered, random_word
+from rank_unrank.rank_fast import FasterRankerUnranker
+
+
+def gen_word(kind: str, n: int, k: int) -> tuple[int]:
+    if kind == "random":
+        return random_word(n, k, seed=n)
+    elif kind == "fib":
+        i = 0
+        while len(fib_word(i)) < n:
+            i += 1
+        return fib_word(i)[:n]
+    elif kind == "constant":
+        return (1,) * n
+    raise ValueError(f"unknown word kind: {kind}")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10**5
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    kind = sys.argv[3] if len(sys.argv) > 3 else "random"
+
+    w = gen_word(kind, n, k)
+    bordered = is_bordered(w)
+    print(f"rank n={n} k={k} word={kind} recursion limit={sys.getrecursionlimit()}")
+    start = time.perf_counter()
+    r = FasterRankerUnranker().rank(w, k, bordered)
+    elapsed = time.perf_counter() - start
+    print(f"time={elapsed:.2f}s rank bits={r.bit_length()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 #!/usr/bin/env python
-import sys
+import os
 from functools import partial
 import matplotlib.pyplot as plt
 import matplotlib.ticker as mt
@@ -8,7 +8,13 @@ import perfplot
 #
 import rank_unrank
 from rank_unrank.rank_ub import UBRankerUnranker
-from rank_unrank.rank_fast import FasterRankerUnranker
+from rank_unrank.rank_fast import FasterRankerUnranker, WordTool
+from rank_unrank.rank_fast_subproblems import (
+    ArraySumQueries,
+    NaiveSumQueries,
+    SumQueries,
+)
+from rank_unrank.texts import calc_a_b, calculate_all_periods_of_all_prefixes
 
 
 def rank_gabric(w, k):
@@ -27,6 +33,156 @@ def unrank_faster(r, n, k):
     return FasterRankerUnranker().unrank(r, n, k, True)
 
 
+PARALLEL_RANKER = FasterRankerUnranker(workers=os.cpu_count() or 1)
+
+
+def rank_faster_parallel(w, k):
+    return PARALLEL_RANKER.rank(w, k, True)
+
+
+def gen_parallel_benchmarks(output_fn: str, title: str, setup_func: callable) -> None:
+    n_range = range(1000, 5001, 1000)
+    out = perfplot.bench(
+        setup=setup_func,
+        kernels=[rank_faster, rank_faster_parallel],
+        labels=["New algorithm", f"New algorithm, {PARALLEL_RANKER.workers} workers"],
+        n_range=n_range,
+        xlabel="word size",
+    )
+    ax = plt.gca()
+    ax.xaxis.set_ticks(n_range)
+    ax.xaxis.set_major_formatter(mt.StrMethodFormatter("{x}"))
+    ax.set_title(title)
+    out.save(output_fn, transparent=True, bbox_inches="tight", logx=False, logy=True)
+
+
+MODULAR_RANKER = FasterRankerUnranker(modular=True)
+
+
+def rank_faster_modular(w, k):
+    return MODULAR_RANKER.rank(w, k, True)
+
+
+def rank_faster_mod_p(w, k):
+    return FasterRankerUnranker().rank_mod(w, k, True, 2**61 - 1)
+
+
+def gen_modular_benchmarks(
+    output_fn: str, title: str, setup_func: callable, exact: bool = False
+) -> None:
+    if exact:
+        # CRT reconstruction runs the recurrences once per prime
+        kernels = [rank_faster, rank_faster_modular]
+        labels = ["New algorithm", "New algorithm, modular + CRT"]
+        n_range = range(500, 2001, 500)
+    else:
+        kernels = [rank_faster, rank_faster_mod_p]
+        labels = ["New algorithm", "New algorithm, rank mod p"]
+        n_range = range(2000, 10001, 2000)
+    out = perfplot.bench(
+        setup=setup_func,
+        kernels=kernels,
+        labels=labels,
+        n_range=n_range,
+        xlabel="word size",
+        equality_check=None,
+    )
+    ax = plt.gca()
+    ax.xaxis.set_ticks(n_range)
+    ax.xaxis.set_major_formatter(mt.StrMethodFormatter("{x}"))
+    ax.set_title(title)
+    out.save(output_fn, transparent=True, bbox_inches="tight", logx=False, logy=True)
+
+
+def word_tool_rebuild(w, k):
+    for i in range(len(w) + 1):
+        wt = WordTool(w[:i], k)
+    return wt.periods
+
+
+def word_tool_append(w, k):
+    wt = WordTool([], k)
+    for c in w:
+        wt.append(c)
+    return wt.periods
+
+
+def gen_word_tool_benchmarks(output_fn: str, title: str, setup_func: callable) -> None:
+    n_range = range(1000, 5001, 1000)
+    out = perfplot.bench(
+        setup=setup_func,
+        kernels=[word_tool_rebuild, word_tool_append],
+        labels=["WordTool rebuilt per position", "WordTool.append"],
+        n_range=n_range,
+        xlabel="word size",
+    )
+    ax = plt.gca()
+    ax.xaxis.set_ticks(n_range)
+    ax.xaxis.set_major_formatter(mt.StrMethodFormatter("{x}"))
+    ax.set_title(title)
+    out.save(output_fn, transparent=True, bbox_inches="tight", logx=False, logy=True)
+
+
+def sum_queries_factory(cls):
+    def run_queries(w, k):
+        # all the queries of a single WordTool.B(len(w), w[-1], 2 * len(w)) call
+        n = len(w)
+        a, b = calc_a_b(w)
+        borders = calculate_all_periods_of_all_prefixes(w)[-1].to_borders(n)
+        sq = cls(a, b) if cls is NaiveSumQueries else cls(a, borders)
+        return [sq.sum(m - n + 1, m // 2, m - n) for m in range(n, 2 * n + 1)]
+
+    return run_queries
+
+
+def gen_sum_queries_benchmarks(
+    output_fn: str, title: str, setup_func: callable
+) -> None:
+    n_range = range(500, 2501, 500)
+    out = perfplot.bench(
+        setup=setup_func,
+        kernels=[
+            sum_queries_factory(NaiveSumQueries),
+            sum_queries_factory(SumQueries),
+            sum_queries_factory(ArraySumQueries),
+        ],
+        labels=["NaiveSumQueries", "SumQueries (dict)", "ArraySumQueries"],
+        n_range=n_range,
+        xlabel="word size",
+    )
+    ax = plt.gca()
+    ax.xaxis.set_ticks(n_range)
+    ax.xaxis.set_major_formatter(mt.StrMethodFormatter("{x}"))
+    ax.set_title(title)
+    out.save(output_fn, transparent=True, bbox_inches="tight", logx=False, logy=True)
+
+
+def gen_alphabet_benchmarks(output_fn: str, title: str, n: int, rank: bool) -> None:
+    """time as a function of log2(k), for words of length n"""
+
+    def setup(e):
+        k = 2**e
+        w = rank_unrank.texts.random_word(n, k, seed=e)
+        if rank:
+            return (w, k)
+        return (FasterRankerUnranker().rank(w, k, True), n, k)
+
+    n_range = [1, 2, 4, 8, 16, 24, 32]
+    out = perfplot.bench(
+        setup=setup,
+        kernels=[rank_gabric, rank_faster] if rank else [unrank_gabric, unrank_faster],
+        labels=["Gabric algorithm", "New algorithm"],
+        n_range=n_range,
+        xlabel="log2(k)",
+        equality_check=lambda *res: all(x == res[0] for x in res),
+    )
+    ax = plt.gca()
+    ax.xaxis.set_ticks(n_range)
+    ax.xaxis.set_major_formatter(mt.StrMethodFormatter("{x}"))
+    ax.set_title(title)
+    out.save(output_fn, transparent=True, bbox_inches="tight", logx=False, logy=True)
+
+
 def gen_benchmarks(
     output_fn: str, title: str, setup_func: callable, rank: bool = True
 ) -> None:
@@ -58,8 +214,6 @@ def gen_benchmarks(
 
 
 def main():
-    sys.setrecursionlimit(10**5)
-
     def setup_unrank(n, k):
         r = k ** (n - 10)
         return (r, n, k)
@@ -68,6 +222,11 @@ def main():
         w = rank_unrank.texts.random_word(n, k, seed=n)
         return (w, k)
 
+    def setup_periodic(n, k):
+        # many borders, grouped into long arithmetic sequences
+        w = rank_unrank.texts.random_word(7, k, seed=n)
+        return ((w * n)[:n], k)
+
     print("k=2 unrank")
     gen_benchmarks(
         "/tmp/unrank-perf-k2.png", "unrank k=2", partial(setup_unrank, k=2), rank=False
@@ -80,6 +239,43 @@ def main():
     )
     print("k=5 rank")
     gen_benchmarks("/tmp/rank-perf-k5.png", "rank k=5", partial(setup_random, k=5))
+    print("large alphabets rank")
+    gen_alphabet_benchmarks(
+        "/tmp/rank-perf-alphabet.png", "rank n=100, k up to 2^32", 100, rank=True
+    )
+    print("large alphabets unrank")
+    gen_alphabet_benchmarks(
+        "/tmp/unrank-perf-alphabet.png", "unrank n=100, k up to 2^32", 100, rank=False
+    )
+    print("k=2 WordTool (unrank prefixes)")
+    gen_word_tool_benchmarks(
+        "/tmp/word-tool-perf-k2.png",
+        "WordTool over all prefixes k=2",
+        partial(setup_random, k=2),
+    )
+    print("k=2 parallel rank")
+    gen_parallel_benchmarks(
+        "/tmp/rank-parallel-perf-k2.png",
+        "parallel rank k=2",
+        partial(setup_random, k=2),
+    )
+    print("k=2 rank mod p")
+    gen_modular_benchmarks(
+        "/tmp/rank-mod-p-perf-k2.png", "rank mod p k=2", partial(setup_random, k=2)
+    )
+    print("k=2 modular rank with CRT")
+    gen_modular_benchmarks(
+        "/tmp/rank-modular-perf-k2.png",
+        "modular rank k=2",
+        partial(setup_random, k=2),
+        exact=True,
+    )
+    print("k=2 sum queries (periodic words)")
+    gen_sum_queries_benchmarks(
+        "/tmp/sum-queries-perf-k2.png",
+        "sum queries k=2",
+        partial(setup_periodic, k=2),
+    )
 
 
 if __name__ == "__main__":
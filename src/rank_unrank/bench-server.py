@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""
+Latency and throughput of the rank server compared to repeated CLI calls.
+
+usage: bench-server.py [requests] [length] [alphabet] [workers]
+"""
+
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from rank_unrank.client import Client
+from rank_unrank.texts import random_word
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def report(name: str, count: int, elapsed: float) -> None:
+    print(
+        f"{name:>20}: {count} requests in {elapsed:.2f}s, "
+        f"{1000 * elapsed / count:.2f}ms/request, {count / elapsed:.1f} requests/s"
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    k = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+    workers = int(sys.argv[4]) if len(sys.argv) > 4 else 4
+    words = [random_word(n, k, seed=i) for i in range(count)]
+
+    start = time.perf_counter()
+    for w in words:
+        subprocess.run(
+            [
+                "rank-unrank",
+                "rank",
+                "-k",
+                str(k),
+                "--alg",
+                "fast",
+                ",".join(map(str, w)),
+            ],
+            check=True,
+            capture_output=True,
+        )
+    report("cli", count, time.perf_counter() - start)
+
+    port = free_port()
+    server = subprocess.Popen(
+        ["rank-unrank", "serve", "--port", str(port), "-j", str(workers)],
+        stdout=subprocess.PIPE,
+    )
+    try:
+        server.stdout.readline()  # listening
+        with Client(port=port) as c:
+            c.rank(words[0], k)  # starts a worker
+            start = time.perf_counter()
+            for w in words:
+                c.rank(w, k)
+            report("server (1 client)", count, time.perf_counter() - start)
+
+        def rank_all(ws):
+            with Client(port=port) as c:
+                return [c.rank(w, k) for w in ws]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(workers) as executor:
+            list(executor.map(rank_all, [words[i::workers] for i in range(workers)]))
+        report(f"server ({workers} clients)", count, time.perf_counter() - start)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Startup cost of the command line tool: import times (python -X importtime) and
+wall time per invocation of a few cheap commands.
+
+usage: bench-startup.py [runs] [--max-ms MS]
+
+With --max-ms the exit status is 1 if any command takes longer than MS
+milliseconds (min over the runs), or if importing rank_unrank.tool loads one of
+the modules that only some commands need.
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+
+# must not be imported by `import rank_unrank.tool`
+LAZY_MODULES = [
+    "rank_unrank.rank_fast",
+    "rank_unrank.rank_ub",
+    "rank_unrank.batch",
+    "rank_unrank.server",
+    "rank_unrank.sampling",
+    "rank_unrank.instrument",
+    "asyncio",
+    "multiprocessing",
+    "numpy",
+]
+
+COMMANDS = {
+    "import": ["-c", "import rank_unrank.tool"],
+    "--help": ["-m", "rank_unrank.tool", "--help"],
+    "rank fast": ["-m", "rank_unrank.tool", "rank", "-k", "2", "--no-debug", "1,2,1"],
+    "rank ub": ["-m", "rank_unrank.tool", "rank", "-k", "2", "--alg", "ub", "1,2,1"],
+    "unrank fast": ["-m", "rank_unrank.tool", "unrank", "-n", "8", "--no-debug", "5"],
+    "sample": ["-m", "rank_unrank.tool", "sample", "-n", "8", "--seed", "1"],
+}
+
+
+def import_times(statement: str) -> list[tuple[str, int, int]]:
+    """(module, self us, cumulative us) of every module imported by statement"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        times.append((name.strip(), int(self_us), int(cumulative_us)))
+    return times
+
+
+def wall_ms(args: list[str], runs: int) -> float:
+    """min wall time of runs invocations, in milliseconds"""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], check=True, capture_output=True)
+        best = min(best, time.perf_counter() - start)
+    return 1000 * best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("runs", type=int, nargs="?", default=10)
+    parser.add_argument("--max-ms", type=float)
+    args = parser.parse_args()
+    ok = True
+
+    times = import_times("import rank_unrank.tool")
+    print("slowest imports of rank_unrank.tool (cumulative ms):")
+    for name, _, cumulative in sorted(times, key=lambda t: -t[2])[:10]:
+        print(f"  {name:<40} {cumulative / 1000:>8.2f}")
+    imported = {name for name, _, _ in times}
+    for name in LAZY_MODULES:
+        if name in imported:
+            print(f"  {name} is imported eagerly")
+            ok = False
+
+    print(f"wall time per invocation (min of {args.runs}, ms):")
+    baseline = wall_ms(["-c", "pass"], args.runs)
+    print(f"  {'python -c pass':<40} {baseline:>8.2f}")
+    for name, command in COMMANDS.items():
+        ms = wall_ms(command, args.runs)
+        slow = args.max_ms is not None and ms > args.max_ms
+        ok = ok and not slow
+        print(f"  {name:<40} {ms:>8.2f} {'SLOW' if slow else ''}")
+    if args.max_ms is not None and not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+"""
+Benchmark suite: rank and unrank of both algorithms, both classes, several
+alphabet sizes and adversarial words, with regression checks against a baseline.
+
+usage:
+    bench-suite.py record DIR [pyperf options]     # DIR/time.json, DIR/memory.json
+    bench-suite.py compare BASELINE_DIR DIR [--time-threshold 0.1]
+                                            [--memory-threshold 0.1]
+    bench-suite.py [pyperf options]                # a single pyperf run
+
+Results are pyperf JSON files (memory.json holds tracemalloc peaks in bytes
+instead of timings). compare exits with status 1 if any benchmark got slower
+(or uses more memory) than the baseline by more than the threshold.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+from rank_unrank.rank_fast import FasterRankerUnranker
+from rank_unrank.rank_ub import UBRankerUnranker
+from rank_unrank.tables import count_table
+from rank_unrank.texts import fib_word, random_word
+
+ALPHABETS = [2, 4, 26, 256, 2**16, 2**32]
+KINDS = ["random", "fib", "constant", "periodic"]
+RANKERS = {"fast": FasterRankerUnranker, "ub": UBRankerUnranker}
+LENGTHS = {"fast": 200, "ub": 200}
+
+_fast = FasterRankerUnranker()
+
+
+def gen_word(kind: str, n: int, k: int, bordered: bool) -> tuple[int]:
+    if kind == "random":
+        w = random_word(n, k, seed=n * k)
+    elif kind == "fib":
+        i = 0
+        while len(fib_word(i)) < n:
+            i += 1
+        w = fib_word(i)[:n]
+    elif kind == "constant":
+        w = (1,) * n
+    elif kind == "periodic":
+        period = random_word(7, k, seed=k)
+        w = (period * (n // 7 + 1))[:n]
+    else:
+        raise ValueError(f"unknown word kind: {kind}")
+    if bordered:
+        return w[:-1] + (w[0],)
+    # the first unbordered word >= w (or the last one), which keeps a long
+    # prefix of w: rank counts the unbordered words < w, plus one
+    r = min(_fast.rank(w, k, False), count_table(k, n, False)[n])
+    return _fast.unrank(r, n, k, False)
+
+
+def cases(select: str = ""):
+    """(name, function, args) of every benchmark with a name matching select"""
+    # ranks do not depend on the algorithm, so they are all computed by the fast one
+    for alg, ranker_class in RANKERS.items():
+        n = LENGTHS[alg]
+        for k in ALPHABETS:
+            words = {
+                (kind, bordered): gen_word(kind, n, k, bordered)
+                for kind in KINDS
+                for bordered in (True, False)
+            }
+            assert len(set(words.values())) == len(words), f"duplicate words, k={k}"
+            for kind in KINDS:
+                for bordered in (True, False):
+                    w = words[kind, bordered]
+                    ranker = ranker_class()
+                    cls = "B" if bordered else "U"
+                    name = f"{alg}-{cls}-k{k}-n{n}-{kind}"
+                    if re.search(select, f"rank-{name}"):
+                        yield f"rank-{name}", ranker.rank, (w, k, bordered)
+                    if re.search(select, f"unrank-{name}"):
+                        r = _fast.rank(w, k, bordered)
+                        yield f"unrank-{name}", ranker.unrank, (r, n, k, bordered)
+
+
+def run_pyperf():
+    import pyperf
+
+    def add_cmdline_args(cmd, args):
+        if args.select:
+            cmd.extend(["--select", args.select])
+
+    runner = pyperf.Runner(add_cmdline_args=add_cmdline_args)
+    runner.argparser.add_argument(
+        "--select", default="", help="regex on benchmark names"
+    )
+    args = runner.parse_args()
+    for name, func, func_args in cases(args.select):
+        runner.bench_func(name, func, *func_args)
+
+
+def record(directory: str, pyperf_args: list[str]) -> None:
+    os.makedirs(directory, exist_ok=True)
+    script = os.path.abspath(__file__)
+    for fn, extra in [("time.json", []), ("memory.json", ["--tracemalloc"])]:
+        path = os.path.join(directory, fn)
+        if os.path.exists(path):
+            os.unlink(path)
+        cmd = [sys.executable, script, "-o", path, *extra, *pyperf_args]
+        subprocess.run(cmd, check=True)
+
+
+def load_means(path: str) -> dict[str, float]:
+    import pyperf
+
+    suite = pyperf.BenchmarkSuite.load(path)
+    return {b.get_name(): b.mean() for b in suite.get_benchmarks()}
+
+
+def compare(baseline: str, current: str, thresholds: dict[str, float]) -> bool:
+    """prints the changes, returns False if anything regressed"""
+    ok = True
+    for fn, threshold in thresholds.items():
+        old = load_means(os.path.join(baseline, fn))
+        new = load_means(os.path.join(current, fn))
+        print(f"{fn} (threshold {threshold:+.0%})")
+        for name in sorted(old.keys() & new.keys()):
+            change = new[name] / old[name] - 1
+            regressed = change > threshold
+            ok = ok and not regressed
+            mark = "REGRESSION" if regressed else ""
+            print(
+                f"  {name:<36} {old[name]:>12.6g} {new[name]:>12.6g} "
+                f"{change:>+8.1%} {mark}"
+            )
+        for name in sorted(old.keys() - new.keys()):
+            print(f"  {name:<36} missing")
+    return ok
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "record":
+        if len(sys.argv) < 3:
+            sys.exit("usage: bench-suite.py record DIR [pyperf options]")
+        record(sys.argv[2], sys.argv[3:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "compare":
+        parser = argparse.ArgumentParser(prog="bench-suite.py compare")
+        parser.add_argument("baseline")
+        parser.add_argument("current")
+        parser.add_argument("--time-threshold", type=float, default=0.1)
+        parser.add_argument("--memory-threshold", type=float, default=0.1)
+        args = parser.parse_args(sys.argv[2:])
+        thresholds = {
+            "time.json": args.time_threshold,
+            "memory.json": args.memory_threshold,
+        }
+        if not compare(args.baseline, args.current, thresholds):
+            sys.exit(1)
+    else:
+        run_pyperf()
+
+
+if __name__ == "__main__":
+    main()
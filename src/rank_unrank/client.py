@@ -0,0 +1,85 @@
+"""
+Blocking client of rank_unrank.server.
+"""
+
+import itertools
+import json
+import socket
+from typing import Iterable, Optional, Sequence
+
+
+class ServerError(RuntimeError):
+    pass
+
+
+class Client:
+    """Connection to a running server, e.g.
+
+    with Client(port=8765) as c:
+        c.rank([1, 2, 1], k=2)
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: Optional[int] = None,
+        unix_path: Optional[str] = None,
+        alg: str = "fast",
+    ) -> None:
+        if unix_path is not None:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(unix_path)
+        else:
+            self.sock = socket.create_connection((host, port))
+        self.file = self.sock.makefile("rwb")
+        self.alg = alg
+        self.ids = itertools.count(1)
+
+    def request(self, op: str, **kwargs):
+        """sends a single request and waits for its result"""
+        request_id = next(self.ids)
+        request = {"id": request_id, "op": op, "alg": self.alg, **kwargs}
+        self.file.write(json.dumps(request, separators=(",", ":")).encode() + b"\n")
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ServerError("connection closed")
+        response = json.loads(line)
+        # errors of the connection itself (e.g. a request line too long) have no id
+        if "error" in response and response["id"] in (request_id, None):
+            raise ServerError(response["error"])
+        assert response["id"] == request_id
+        return response["result"]
+
+    def rank(self, seq: Sequence[int], k: int, bordered: Optional[bool] = None) -> int:
+        return self.request("rank", seq=list(seq), k=k, bordered=bordered)
+
+    def unrank(self, r: int, n: int, k: int, bordered: bool) -> list[int]:
+        return self.request("unrank", r=r, n=n, k=k, bordered=bordered)
+
+    def rank_many(
+        self, words: Iterable[Sequence[int]], k: int, bordered: bool
+    ) -> list[int]:
+        words = [list(w) for w in words]
+        return self.request("rank_many", words=words, k=k, bordered=bordered)
+
+    def unrank_many(
+        self, ranks: Iterable[int], n: int, k: int, bordered: bool
+    ) -> list[list[int]]:
+        return self.request(
+            "unrank_many", ranks=list(ranks), n=n, k=k, bordered=bordered
+        )
+
+    def count(self, n: int, k: int, bordered: bool) -> int:
+        """number of the bordered (or unbordered) words of length n"""
+        return self.request("count", n=n, k=k, bordered=bordered)
+
+    def close(self) -> None:
+        self.file.close()
+        self.sock.close()
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
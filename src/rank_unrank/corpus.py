@@ -0,0 +1,234 @@
+"""
+Binary corpora of words of a single length, and their ranks.
+
+A corpus file holds count words of length n over {1..k}, packed:
+
+    header:  magic b"RUWC", version (u16), itemsize (u16, 1, 2 or 4), k (u64),
+             n (u64), count (u64)
+    data:    count * n letters, unsigned little-endian integers of itemsize bytes
+
+Corpora are memory-mapped read-only and every word is a memoryview slice of the
+mapping, so words reach the rankers (and texts.calc_pi) without being parsed or
+copied. The ranks of a corpus are written in the matching format:
+
+    header:  magic b"RURK", version (u16), width (u16), k (u64), n (u64),
+             count (u64)
+    records: class (u8, 1 if bordered) and rank (unsigned little-endian integer
+             of width bytes), the rank of the word in its own class
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+from typing import Iterable, Iterator, Sequence
+
+from rank_unrank import ranker_class
+from rank_unrank.texts import is_bordered
+
+CORPUS_MAGIC = b"RUWC"
+RANKS_MAGIC = b"RURK"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQQQ")
+
+# itemsize -> array / memoryview format of unsigned ints of that size
+TYPECODES = {1: "B", 2: "H", 4: "I" if array("I").itemsize == 4 else "L"}
+
+
+class CorpusFormatError(ValueError):
+    pass
+
+
+def letter_size(k: int) -> int:
+    """smallest itemsize able to hold the letters 1..k"""
+    for itemsize in TYPECODES:
+        if k < 1 << (8 * itemsize):
+            return itemsize
+    raise ValueError(f"alphabet of size {k} does not fit in 32-bit letters")
+
+
+def rank_width(n: int, k: int) -> int:
+    """bytes of a rank of a word of length n, all ranks are at most k**n"""
+    return max(1, ((k**n).bit_length() + 7) // 8)
+
+
+class _Writer:
+    """file with a header, whose count is filled in when closed; a file left by
+    an exception keeps count 0 in its header, so it fails to open"""
+
+    def __init__(self, path: str, magic: bytes, size: int, k: int, n: int) -> None:
+        self.f = open(path, "wb")
+        self.header = (magic, VERSION, size, k, n)
+        self.count = 0
+        self.f.write(HEADER.pack(*self.header, 0))
+
+    def close(self) -> None:
+        self.f.seek(0)
+        self.f.write(HEADER.pack(*self.header, self.count))
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.f.close()
+
+
+class CorpusWriter(_Writer):
+    """writes words of length n over {1..k} one by one"""
+
+    def __init__(self, path: str, n: int, k: int) -> None:
+        self.n, self.k = n, k
+        self.itemsize = letter_size(k)
+        super().__init__(path, CORPUS_MAGIC, self.itemsize, k, n)
+
+    def write(self, w: Sequence[int]) -> None:
+        if len(w) != self.n or (w and (min(w) < 1 or max(w) > self.k)):
+            raise ValueError(f"word has to be of length {self.n}, over 1..{self.k}")
+        data = array(TYPECODES[self.itemsize], w)
+        if sys.byteorder != "little":
+            data.byteswap()
+        self.f.write(data)
+        self.count += 1
+
+
+class RanksWriter(_Writer):
+    """writes (bordered, rank) of words of length n over {1..k} one by one"""
+
+    def __init__(self, path: str, n: int, k: int) -> None:
+        self.width = rank_width(n, k)
+        super().__init__(path, RANKS_MAGIC, self.width, k, n)
+
+    def write(self, bordered: bool, rank: int) -> None:
+        self.f.write(bytes((bordered,)) + rank.to_bytes(self.width, "little"))
+        self.count += 1
+
+
+def write_corpus(path: str, words: Iterable[Sequence[int]], n: int, k: int) -> int:
+    """writes the words, returns their number"""
+    with CorpusWriter(path, n, k) as writer:
+        for w in words:
+            writer.write(w)
+    return writer.count
+
+
+def write_ranks(path: str, records: Iterable[tuple[bool, int]], n: int, k: int) -> int:
+    """writes (bordered, rank) records, returns their number"""
+    with RanksWriter(path, n, k) as writer:
+        for bordered, rank in records:
+            writer.write(bordered, rank)
+    return writer.count
+
+
+class _Mapped:
+    """read-only memory-mapped file with a header"""
+
+    def __init__(self, path: str, magic: bytes) -> None:
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.mm) < HEADER.size:
+            raise CorpusFormatError(f"{path}: truncated header")
+        header = HEADER.unpack_from(self.mm, 0)
+        if header[0] != magic or header[1] != VERSION:
+            raise CorpusFormatError(f"{path}: not a version {VERSION} file")
+        self.size, self.k, self.n, self.count = header[2:]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        try:
+            self.close()
+        except BufferError:
+            # slices are still referenced, e.g. from the traceback; the mapping
+            # is closed once they are released, the exception is not masked
+            if exc_type is None:
+                raise
+
+
+class Corpus(_Mapped):
+    """Read-only, memory-mapped corpus; words are memoryview slices of the file,
+    valid until the corpus is closed (and it can be closed only when none of them
+    is referenced any more)"""
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path, CORPUS_MAGIC)
+        self.itemsize = self.size
+        if self.itemsize not in TYPECODES:
+            raise CorpusFormatError(f"{path}: letters of {self.itemsize} bytes")
+        end = HEADER.size + self.count * self.n * self.itemsize
+        if len(self.mm) != end:
+            raise CorpusFormatError(f"{path}: size {len(self.mm)} != {end}")
+        typecode = TYPECODES[self.itemsize]
+        if sys.byteorder == "little":
+            self.letters = memoryview(self.mm)[HEADER.size :].cast(typecode)
+        else:
+            data = array(typecode, self.mm[HEADER.size :])
+            data.byteswap()
+            self.letters = memoryview(data)
+
+    def __getitem__(self, i: int) -> memoryview:
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return self.letters[i * self.n : (i + 1) * self.n]
+
+    def __iter__(self) -> Iterator[memoryview]:
+        letters, n = self.letters, self.n
+        for start in range(0, self.count * n, n):
+            yield letters[start : start + n]
+
+    def close(self) -> None:
+        self.letters.release()
+        super().close()
+
+
+class Ranks(_Mapped):
+    """Read-only, memory-mapped ranks, (bordered, rank) records"""
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path, RANKS_MAGIC)
+        self.width = self.size
+        end = HEADER.size + self.count * (self.width + 1)
+        if len(self.mm) != end:
+            raise CorpusFormatError(f"{path}: size {len(self.mm)} != {end}")
+
+    def __getitem__(self, i: int) -> tuple[bool, int]:
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        start = HEADER.size + i * (self.width + 1)
+        rank = int.from_bytes(self.mm[start + 1 : start + 1 + self.width], "little")
+        return bool(self.mm[start]), rank
+
+    def __iter__(self) -> Iterator[tuple[bool, int]]:
+        for i in range(self.count):
+            yield self[i]
+
+
+def rank_corpus(
+    corpus: Corpus, alg: str = "fast", chunk_size: int = 256
+) -> Iterator[tuple[bool, int]]:
+    """(bordered, rank) of every word of the corpus, in its own class
+
+    Words are classified straight from the mapping, and ranked with rank_many in
+    chunks (as batch.rank_chunk does), so prefixes shared by the words of a chunk
+    are ranked once."""
+    ranker = ranker_class(alg)()
+    k = corpus.k
+    for start in range(0, len(corpus), chunk_size):
+        words = [corpus[i] for i in range(start, min(start + chunk_size, len(corpus)))]
+        classes = [is_bordered(w) for w in words]
+        ranks = {}
+        for bordered in (True, False):
+            group = [w for w, c in zip(words, classes) if c == bordered]
+            ranks[bordered] = iter(ranker.rank_many(group, k, bordered))
+        for c in classes:
+            yield c, next(ranks[c])
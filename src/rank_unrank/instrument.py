@@ -0,0 +1,208 @@
+"""
+Opt-in instrumentation of the hot paths of FasterRankerUnranker and UBRankerUnranker.
+
+    with instrument.profiled() as stats:
+        FasterRankerUnranker().rank(w, k, True)
+    print(stats.table())
+
+While enabled, the functions listed in PHASES are replaced by wrappers that count
+calls, measure time (inclusive of nested phases, recursive calls are timed once)
+and record the largest bit length of the int results; CACHES count hits and
+misses. disable() puts the original functions back, so there is no cost at all
+when instrumentation is off. Work done in other processes (workers > 1, the
+server) is not included.
+"""
+
+import functools
+import json
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from rank_unrank import rank_fast, rank_fast_subproblems, rank_ub, tables, texts
+
+# (owner, attribute, phase name, record bit lengths of results)
+PHASES = [
+    (rank_fast.FasterRankerUnranker, "rank", "fast.rank", True),
+    (rank_fast.FasterRankerUnranker, "rank_many", "fast.rank_many", False),
+    (rank_fast.FasterRankerUnranker, "unrank", "fast.unrank", False),
+    (rank_fast.FasterRankerUnranker, "unrank_many", "fast.unrank_many", False),
+    (rank_fast, "calculate_all_periods_of_all_prefixes", "periods", False),
+    (rank_fast, "calculate_all_periods_single_step", "periods", False),
+    (rank_fast, "extend_periods", "periods", False),
+    (texts.PeriodsTable, "append", "periods", False),
+    (rank_fast, "calc_a_b", "calc_a_b", False),
+    (rank_fast.WordTool, "B", "WordTool.B", True),
+    (rank_fast.WordTool, "U", "WordTool.U", True),
+    (rank_fast.BEngine, "B", "BEngine.B", True),
+    (rank_fast.BEngine, "U", "BEngine.U", True),
+    (rank_fast.BEngine, "_move_coef", "U recurrence", False),
+    (rank_fast_subproblems.SumQueries, "sum", "sum_queries", False),
+    (rank_fast_subproblems.ArraySumQueries, "sum", "sum_queries", False),
+    (rank_fast, "implicit_problem", "implicit_problem", False),
+    (rank_ub.UBRankerUnranker, "rank", "ub.rank", True),
+    (rank_ub.UBRankerUnranker, "unrank", "ub.unrank", False),
+    (rank_ub.IncrementalB, "append", "calc_a_b", False),
+    (rank_ub.IncrementalB, "B", "ub.B", True),
+]
+
+# (owner, attribute, cache name, is_hit(args) checked before the call)
+CACHES = [
+    (
+        rank_fast_subproblems.SumQueries,
+        "calc_sum_a",
+        "sum_a",
+        lambda args: (args[1], args[2]) in args[0].cache_sum_a,
+    ),
+    (
+        rank_fast_subproblems.ArraySumQueries,
+        "table",
+        "sum_a_tables",
+        lambda args: len(args[0].tables.get(args[1], ())) == len(args[0].a),
+    ),
+    (
+        tables,
+        "_load",
+        "tables",
+        lambda args: tables._memory is not None and args[:3] in tables._memory,
+    ),
+]
+
+
+class PhaseStats:
+    __slots__ = ("calls", "seconds", "active", "max_bits")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.seconds = 0.0
+        self.active = False
+        self.max_bits = 0
+
+
+class CacheStats:
+    __slots__ = ("hits", "misses")
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_ratio(self) -> Optional[float]:
+        total = self.hits + self.misses
+        return self.hits / total if total else None
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.phases: dict[str, PhaseStats] = {}
+        self.caches: dict[str, CacheStats] = {}
+
+    def to_dict(self) -> dict:
+        return {
+            "phases": {
+                name: {
+                    "calls": p.calls,
+                    "seconds": p.seconds,
+                    "max_bits": p.max_bits,
+                }
+                for name, p in self.phases.items()
+                if p.calls
+            },
+            "caches": {
+                name: {"hits": c.hits, "misses": c.misses, "hit_ratio": c.hit_ratio}
+                for name, c in self.caches.items()
+                if c.hits + c.misses
+            },
+        }
+
+    def json(self) -> str:
+        return json.dumps(self.to_dict())
+
+    def table(self) -> str:
+        d = self.to_dict()
+        lines = [f"{'phase':<20} {'calls':>10} {'seconds':>10} {'max bits':>10}"]
+        for name, p in sorted(d["phases"].items(), key=lambda x: -x[1]["seconds"]):
+            lines.append(
+                f"{name:<20} {p['calls']:>10} {p['seconds']:>10.4f} "
+                f"{p['max_bits'] or '':>10}"
+            )
+        lines.append(f"{'cache':<20} {'hits':>10} {'misses':>10} {'hit ratio':>10}")
+        for name, c in d["caches"].items():
+            lines.append(
+                f"{name:<20} {c['hits']:>10} {c['misses']:>10} {c['hit_ratio']:>10.3f}"
+            )
+        return "\n".join(lines)
+
+
+def _timed(func: Callable, phase: PhaseStats, bits: bool) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        phase.calls += 1
+        if phase.active:
+            result = func(*args, **kwargs)
+        else:
+            phase.active = True
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                phase.seconds += time.perf_counter() - start
+                phase.active = False
+        if bits and result.bit_length() > phase.max_bits:
+            phase.max_bits = result.bit_length()
+        return result
+
+    return wrapper
+
+
+def _counted(func: Callable, cache: CacheStats, is_hit: Callable) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if is_hit(args):
+            cache.hits += 1
+        else:
+            cache.misses += 1
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+_stats: Optional[Stats] = None
+_originals: list[tuple[object, str, Callable]] = []
+
+
+def enable() -> Stats:
+    """starts collecting (fresh) stats"""
+    global _stats
+    disable()
+    _stats = Stats()
+    for owner, attr, name, bits in PHASES:
+        phase = _stats.phases.setdefault(name, PhaseStats())
+        _originals.append((owner, attr, vars(owner)[attr]))
+        setattr(owner, attr, _timed(vars(owner)[attr], phase, bits))
+    for owner, attr, name, is_hit in CACHES:
+        cache = _stats.caches.setdefault(name, CacheStats())
+        _originals.append((owner, attr, vars(owner)[attr]))
+        setattr(owner, attr, _counted(vars(owner)[attr], cache, is_hit))
+    return _stats
+
+
+def disable() -> Optional[Stats]:
+    """stops collecting, returns the stats collected so far"""
+    while _originals:
+        owner, attr, func = _originals.pop()
+        setattr(owner, attr, func)
+    return _stats
+
+
+def get_stats() -> Optional[Stats]:
+    return _stats
+
+
+@contextmanager
+def profiled() -> Iterator[Stats]:
+    stats = enable()
+    try:
+        yield stats
+    finally:
+        disable()
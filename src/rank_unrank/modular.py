@@ -0,0 +1,60 @@
+"""
+Word-sized primes and Chinese remaindering, for ranks computed modulo primes.
+"""
+
+# deterministic Miller-Rabin bases for all n < 3.3 * 10^24
+MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+PRIME_BITS = 61
+
+
+def is_prime(n: int) -> bool:
+    if n < 2:
+        return False
+    for p in MILLER_RABIN_BASES:
+        if n % p == 0:
+            return n == p
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in MILLER_RABIN_BASES:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+_primes = []
+
+
+def word_primes(count: int) -> list[int]:
+    """count largest primes below 2**PRIME_BITS"""
+    while len(_primes) < count:
+        p = _primes[-1] - 2 if _primes else (1 << PRIME_BITS) - 1
+        while not is_prime(p):
+            p -= 2
+        _primes.append(p)
+    return _primes[:count]
+
+
+def primes_for_bound(bound: int) -> list[int]:
+    """primes with a product greater than bound"""
+    return word_primes(bound.bit_length() // (PRIME_BITS - 1) + 1)
+
+
+def crt(residues: list[int], primes: list[int]) -> int:
+    """the only 0 <= x < prod(primes) with x % p == r for all the residues"""
+    assert len(residues) == len(primes)
+    x, m = 0, 1
+    for r, p in zip(residues, primes):
+        # x + m * t == r (mod p)
+        t = (r - x) * pow(m, -1, p) % p
+        x += m * t
+        m *= p
+    return x
@@ -0,0 +1,66 @@
+"""
+Parallel evaluation of ranks, that are sums of independent per-position terms.
+"""
+
+from typing import Callable, Optional
+
+# words shorter than this are ranked in the calling process
+PARALLEL_MIN_LENGTH = 256
+
+
+def split_positions(
+    start: int,
+    stop: int,
+    parts: int,
+    cost: Optional[Callable[[int], int]] = None,
+) -> list[tuple[int, int]]:
+    """splits positions [start, stop) into at most parts ranges of similar total cost"""
+    if cost is None:
+        costs = [1] * (stop - start)
+    else:
+        costs = [cost(i) for i in range(start, stop)]
+    total = sum(costs)
+    ranges = []
+    range_start, acc = start, 0
+    for i, c in zip(range(start, stop), costs):
+        acc += c
+        if acc * parts >= total * (len(ranges) + 1) and i + 1 < stop:
+            ranges.append((range_start, i + 1))
+            range_start = i + 1
+    if range_start < stop:
+        ranges.append((range_start, stop))
+    return ranges
+
+
+class PositionsPool:
+    """Process pool summing term(w, n, k, start, stop) over ranges of positions
+
+    Workers receive only the word, so every term has to rebuild its own state
+    (prefix periods, border arrays) from w. Partial sums are added as big ints."""
+
+    def __init__(self, workers: int) -> None:
+        assert workers >= 1
+        self.workers = workers
+        self._executor = None
+
+    def sum(
+        self,
+        term: Callable[[tuple[int], int, int, int, int], int],
+        w: tuple[int],
+        n: int,
+        k: int,
+        ranges: list[tuple[int, int]],
+    ) -> int:
+        if self._executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        futures = [
+            self._executor.submit(term, w, n, k, start, stop) for start, stop in ranges
+        ]
+        return sum(f.result() for f in futures)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,185 @@
+"""
+Approximate ranks: the position of a word among the bordered (or unbordered)
+words of its length, as a fraction in [0, 1) and as log2 of the rank.
+
+The counts of the UB algorithm (see IncrementalB) are divided by the number of
+all the completions of their prefix, so they become probabilities in [0, 1].
+With b(j) = saveB[j] / k^(j-p) and h(m) = H(m) / k^m,
+
+    b(j) = h(p) + sum((1 - b(i)) * k^-i for p < i <= j // 2)     for j > 2p,
+
+and in the same way u(m) = U(m) / k^m = u(m-1) - [m even] * u(m/2) * k^-(m/2).
+The terms of position i of the rank weigh at most k^-i, as do the terms of
+index i of the sums above. The leading 1s of the word add nothing, and the first
+position after them adds at least k^-i times a fraction of the completions. So
+only the leading 1s and the next O(log(1/eps) / log k) letters of the word, and
+the first indices of the sums, are evaluated, in floating point, whatever the
+length of the word (and of its exact rank). The error bound is relative.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Sequence
+
+from rank_unrank.rank_fast_subproblems import first_missing
+from rank_unrank.rank_ub import BorderArrays
+
+# smallest supported error bound, well above the rounding errors of the sums
+MIN_EPS = 2.0**-40
+
+
+@dataclass(frozen=True)
+class ApproxRank:
+    # (rank - 1) / (number of the words of the class),
+    # |fraction - exact| <= error * exact
+    fraction: float
+    error: float
+    log2_rank: float
+
+
+def _cutoff(k: int, cut: float) -> int:
+    """smallest i >= 1 with k^-i <= cut"""
+    return max(1, math.ceil(-math.log(cut) / math.log(k)))
+
+
+def _extend(inv: list[float], size: int, k: int) -> None:
+    """inv[i] = k^-i for all i < size, the powers below the smallest float are 0"""
+    while len(inv) < size and inv[-1] > 0.0:
+        inv.append(inv[-1] / k)
+    inv.extend([0.0] * (size - len(inv)))
+
+
+def _unbordered_fraction(n: int, k: int, inv: list[float], top: int) -> float:
+    """U(n) / k^n; the omitted terms (m > 2 * top) sum to at most 2 * k^-top"""
+    u = [1.0] * (min(n, 2 * top) + 1)
+    for m in range(1, len(u)):
+        u[m] = u[m - 1] - (u[m // 2] * inv[m // 2] if m % 2 == 0 else 0.0)
+    return u[-1]
+
+
+def _bordered_fraction(
+    prefix: BorderArrays, h: list[float], c: int, n: int, inv: list[float], top: int
+) -> float:
+    """b(n) of the prefix w[1..p-1]c, indices i > top of its sum are omitted"""
+    p = len(prefix.w)
+    longest = prefix.longestBorder(c)
+    a_p = int(longest == 0)
+    a = prefix.a + [a_p]
+    h_p = h[-1] + a_p * inv[p]
+    borders = []
+    length = longest
+    while length > 0:
+        borders.append(length)
+        length = prefix.PBA[length]
+
+    def direct(j: int) -> float:
+        # b(j) for p <= j <= 2p
+        d = j - p
+        total = h[d] if d < p else h_p
+        for t in borders:
+            if t + d <= j // 2:
+                total += a[t + d] * inv[d]
+        return total
+
+    if n <= 2 * p:
+        return direct(n)
+    top = min(n // 2, max(top, p))
+    b = [0.0] * (top + 1)
+    s = [0.0] * (top + 1)  # s[m] = sum((1 - b(i)) * k^-i for p < i <= m)
+    for i in range(p, top + 1):
+        b[i] = direct(i) if i <= 2 * p else h_p + s[i // 2]
+        if i > p:
+            s[i] = s[i - 1] + (1.0 - b[i]) * inv[i]
+    return h_p + s[top]
+
+
+def _position_values(
+    prefix: BorderArrays,
+    h: list[float],
+    c: int,
+    n: int,
+    inv: list[float],
+    top: int,
+    bordered: bool,
+) -> list[float]:
+    """fractions of the class among the completions of w[1..p-1]x, for all x < c"""
+    if c == 1:
+        return []  # without walking the borders, they are long in runs of 1s
+    chars = [x for x in prefix.extendingChars() if x < c]
+    values = [_bordered_fraction(prefix, h, x, n, inv, top) for x in chars]
+    others = c - 1 - len(chars)
+    if others:
+        value = _bordered_fraction(prefix, h, first_missing(chars), n, inv, top)
+        values.extend([value] * others)
+    if not bordered:
+        values = [1.0 - value for value in values]
+    return values
+
+
+def approx_rank(
+    seq: Sequence[int], k: int, bordered: bool, eps: float = MIN_EPS
+) -> ApproxRank:
+    """approximate rank of seq among the bordered (or unbordered) words of its
+    length, the fraction is within eps * fraction of (rank - 1) / (number of the
+    words), and log2_rank within about eps of log2(rank)"""
+    if not MIN_EPS <= eps < 1:
+        raise ValueError(f"eps has to be in [{MIN_EPS}, 1)")
+    n = len(seq)
+    if k == 1:
+        if bordered != (n > 1):
+            raise ValueError(f"no {'' if bordered else 'un'}bordered words")
+        return ApproxRank(0.0, 0.0, 0.0)
+    inv = [float(k) ** -i for i in range(_cutoff(k, 2.0**-60) + 1)]
+    den = _unbordered_fraction(n, k, inv, len(inv) - 1)
+    if bordered:
+        den = 1.0 - den
+    if den <= 0.0:
+        raise ValueError(f"no {'' if bordered else 'un'}bordered words")
+
+    # The positions before the first one adding anything (the leading 1s) are
+    # skipped; from the first one, s, the numerator is kept scaled by k^(s+1),
+    # so it does not underflow. It is at least the total v of position s, so
+    # positions >= t add at most cut = eps * v / 8 and omitted sum terms stay
+    # below cut / 4 in total, relative to the numerator.
+    cut = eps / 8
+    top = _cutoff(k, cut / 8) + 1
+    prefix = BorderArrays()  # with h in floats instead of the exact H
+    h = [0.0]  # h[m] = H(m) / k^m
+    # the leading 1s in closed form: the longest border of 1^m is 1^(m-1), so
+    # a[1] is the only 1 of a and h(m) = 1 / k
+    ones = 0
+    while ones < n and seq[ones] == 1:
+        ones += 1
+    if ones:
+        prefix.w += [1] * ones
+        prefix.PBA += range(ones)
+        prefix.a += [1] + [0] * (ones - 1)
+        h += [inv[1]] * ones
+    first = None
+    numerator = 0.0
+    t = n
+    i = ones
+    while i < t:
+        _extend(inv, max(2 * i + 2, top) + 2, k)
+        values = _position_values(prefix, h, seq[i], n, inv, top, bordered)
+        if first is None and sum(values) > 0.0:
+            first = i
+            cut = eps * min(sum(values), 1.0) / 8
+            t = min(n, first + 1 + _cutoff(k, cut))
+            if _cutoff(k, cut / 8) + 1 > top:
+                top = _cutoff(k, cut / 8) + 1
+                continue  # once more, with the sums evaluated further
+        if first is not None:
+            numerator += sum(values) * inv[i - first]
+        prefix.append(seq[i])
+        h.append(h[-1] + prefix.a[-1] * inv[i + 1])
+        i += 1
+
+    if first is None:
+        return ApproxRank(0.0, eps, 0.0)  # the first word of the class
+    # log2(rank - 1) = log2(fraction * k^n * den)
+    log2_fraction = math.log2(numerator / den) - (first + 1) * math.log2(k)
+    fraction = min(2.0**log2_fraction, 1.0)
+    x = log2_fraction + n * math.log2(k) + math.log2(den)
+    log2_rank = x if x > 60 else math.log2(1 + 2**x)
+    return ApproxRank(fraction, eps, log2_rank)
@@ -2,31 +2,71 @@
 Fast implementation of Ranking and Unranking.
 """
 
-from functools import cache
-from typing import Union, Optional
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Callable, Iterable, Iterator, Optional, Sequence, Union
 
+from rank_unrank import tables
 from rank_unrank.base import BaseRankerUnranker
+from rank_unrank.modular import crt, primes_for_bound
+from rank_unrank.parallel import PARALLEL_MIN_LENGTH, PositionsPool, split_positions
 from rank_unrank.texts import (
+    ArithSequence,
     calculate_all_periods_of_all_prefixes,
     calculate_all_periods_single_step,
     calc_a_b,
+    extend_periods,
     PeriodsGroup,
 )
-from rank_unrank.rank_fast_subproblems import SumQueries, implicit_problem
+from rank_unrank.rank_fast_subproblems import (
+    AbstractSumQueries,
+    ArraySumQueries,
+    SumQueries,
+    first_missing,
+    implicit_problem,
+)
 
 
 class WordTool:
-    def __init__(self, seq: Union[list[int], tuple[int]], k: int) -> None:
+    def __init__(
+        self,
+        seq: Union[list[int], tuple[int]],
+        k: int,
+        sum_queries: type[AbstractSumQueries] = SumQueries,
+    ) -> None:
         self.k = k
+        self.sum_queries = sum_queries
         self.n = len(seq)
-        self.seq = seq
-        self.w = (-1,) + tuple(seq)
-        self.periods = calculate_all_periods_of_all_prefixes(seq)
+        # a memoryview (e.g. a word of a corpus) is used as is, until modified
+        self.seq = seq if isinstance(seq, memoryview) else list(seq)
+        self.periods = calculate_all_periods_of_all_prefixes(self.seq)
+
+    def append(self, c: int) -> None:
+        """extends the word by a single character c (periods are updated in O(log n))"""
+        if not isinstance(self.seq, list):
+            self.seq = list(self.seq)
+        self.periods.append(self.seq, c)
+        self.seq.append(c)
+        self.n += 1
+
+    def pop(self) -> int:
+        """removes the last character of the word (and returns it)"""
+        assert self.n > 0
+        if not isinstance(self.seq, list):
+            self.seq = list(self.seq)
+        self.periods.pop()
+        self.n -= 1
+        return self.seq.pop()
 
     def U(self, u_len: int, c: int, n: int) -> int:
         return self.k ** (n - u_len) - self.B(u_len, c, n)
 
     def B(self, u_len: int, c: int, n: int) -> int:
+        return self.k ** (n - u_len) - self.U_table(u_len, c, n)[n]
+
+    def U_table(self, u_len: int, c: int, n: int) -> list[Optional[int]]:
+        """U[m] - number of unbordered words of length m with the prefix
+        seq[:u_len - 1] + [c], for all u_len <= m <= n (entries m < u_len are None)"""
         assert 1 <= u_len <= n
         a, _ = self.calc_a_b(u_len - 1, c)
         if u_len > 0:
@@ -36,7 +76,7 @@ class WordTool:
         else:
             periods = PeriodsGroup([])
         borders = periods.to_borders(u_len)
-        sum_queries = SumQueries(a, borders)
+        sum_queries = self.sum_queries(a, borders)
 
         def precalc_B() -> list[Optional[int]]:
             b1 = [None] * (2 * u_len + 1)
@@ -52,125 +92,525 @@ class WordTool:
                 result[n] = b1[n] + b2[n]
             return result
 
-        @cache
-        def U(n: int) -> int:
-            if n <= 2 * u_len:
-                return self.k ** (n - u_len) - B(n)
-            else:
-                assert n > 2 * u_len
-                if n % 2 == 1:
-                    return self.k * U(n - 1)
-                else:
-                    return self.k * U(n - 1) - U(n // 2)
-
-        def precalc_U(n):
-            for i in range(u_len, n + 1):
-                U(i)
-
-        @cache
-        def B(n: int) -> int:
-            nonlocal B_cache
-            if n <= 2 * u_len:
-                assert B_cache[n] is not None
-                return B_cache[n]
-            else:
-                return self.k ** (n - u_len) - U(n)
-
         B_cache = precalc_B()
-        precalc_U(n)  # cache all U values
-        return B(n)
+        # U recurrence evaluated bottom-up (no recursion, bounded stack)
+        U = [None] * (n + 1)
+        for m in range(u_len, n + 1):
+            if m <= 2 * u_len:
+                U[m] = self.k ** (m - u_len) - B_cache[m]
+            elif m % 2 == 1:
+                U[m] = self.k * U[m - 1]
+            else:
+                U[m] = self.k * U[m - 1] - U[m // 2]
+        return U
 
     def X(self, i: int) -> list[int]:
         assert 0 <= i <= self.n
         if self.n == 0 or i == 0:
             return []
-        result = [self.w[1]]
-        for period_seq in self.periods[i]:
-            result.append(self.w[i + 1 - period_seq.step])
-        return sorted(set(result))
+        seq = self.seq
+        result = {seq[0]}
+        steps = self.periods.steps
+        for j in range(self.periods.offsets[i], self.periods.offsets[i + 1]):
+            result.add(seq[i - steps[j]])
+        return sorted(result)
 
     def X_prim(self, i: int) -> tuple[int, Optional[int]]:
         assert 0 <= i <= self.n
-        x_set = set(self.X(i))
-        count = self.k - len(x_set)
-        repr_c = None
-        for c in range(1, self.k + 1):
-            if c not in x_set:
-                repr_c = c
-                break
-        return (count, repr_c)
+        x = self.X(i)
+        count = self.k - len(x)
+        return (count, first_missing(x) if count > 0 else None)
 
     def Y(self, i: int) -> list[int]:
         assert 0 <= i < self.n
         result = []
         for c in self.X(i):
-            if c < self.w[i + 1]:
+            if c < self.seq[i]:
                 result.append(c)
         return result
 
     def Y_prim(self, i: int) -> tuple[int, Optional[int]]:
         assert 0 <= i < self.n
-        y_set = set(self.Y(i))
-        count = self.w[i + 1] - 1 - len(y_set)
-        repr_c = None
-        for c in range(1, self.w[i + 1]):
-            if c not in y_set:
-                repr_c = c
-                break
-        return (count, repr_c)
+        y = self.Y(i)
+        count = self.seq[i] - 1 - len(y)
+        return (count, first_missing(y) if count > 0 else None)
 
     def calc_a_b(self, i: int, c: int) -> tuple[list[int], list[int]]:
-        seq = self.w[1 : i + 1] + (c,)
+        seq = list(self.seq[:i]) + [c]
         return calc_a_b(seq)
 
 
+def count_completions(
+    u: Sequence[int], k: int, lengths: Iterable[int], bordered: bool
+) -> list[int]:
+    """numbers of bordered (or unbordered) words over k letters with the prefix u,
+    for each of the lengths (all >= len(u)), from a single U table up to the
+    largest length"""
+    lengths = list(lengths)
+    if not lengths:
+        return []
+    p = len(u)
+    if min(lengths) < p:
+        raise ValueError(f"lengths have to be at least the prefix length {p}")
+    n = max(lengths)
+    if p == 0:
+        table = tables.count_table(k, n, bordered)
+        return [table[j] for j in lengths]
+    U = WordTool(u[:-1], k).U_table(p, u[-1], n)
+    if bordered:
+        return [k ** (j - p) - U[j] for j in lengths]
+    return [U[j] for j in lengths]
+
+
+class BEngine:
+    """Answers WordTool.B(u_len, c, n) queries for a fixed n, sharing all the
+    state that does not depend on c between queries of a single rank/unrank call.
+
+    For m > 2*u_len the U recurrence U(m) = k*U(m-1) - [m even]*U(m/2) is linear,
+    so U(n) = sum(coef[m] * U(m) for u_len <= m <= 2*u_len), where coef depends
+    only on (k, n, u_len). The coefficients are kept in a single table and are
+    moved to the neighbouring u_len in O(1) operations.
+
+    With a modulus all the counts are computed modulo it (no big ints)."""
+
+    def __init__(self, wt: WordTool, n: int, modulus: Optional[int] = None) -> None:
+        self.wt = wt
+        self.k = wt.k
+        self.n = n
+        self.modulus = modulus
+        self.pw = [1] * (n + 1)
+        for e in range(1, n + 1):
+            self.pw[e] = self.pw[e - 1] * self.k
+            if modulus:
+                self.pw[e] %= modulus
+        self.a = [0]  # a[i] = 1 iff wt.seq[:i] is unbordered
+        self.horner = [0]  # horner[i] = sum(a[j] * k**(i-j) for 1 <= j <= i)
+        self.sum_a_tables = dict()
+        self.sum_queries = ArraySumQueries(self.a, [], tables=self.sum_a_tables)
+        self.steps = []
+        self.ends = []
+        self.coef = None
+        self.coef_len = None
+        self.base = None
+        self.base_len = None
+
+    def append(self, c: int) -> None:
+        self.wt.append(c)
+
+    def pop(self) -> int:
+        """removes the last character of the word, and all the state derived from it"""
+        c = self.wt.pop()
+        length = self.wt.n + 1
+        if len(self.a) > length:
+            del self.a[length:]
+            del self.horner[length:]
+            for table in self.sum_a_tables.values():
+                del table[length:]
+        self.base_len = None
+        return c
+
+    def _sync(self) -> None:
+        for i in range(len(self.a), self.wt.n + 1):
+            self.a.append(int(self.wt.periods.count(i) == 0))
+            self.horner.append(self.horner[-1] * self.k + self.a[-1])
+            if self.modulus:
+                self.horner[-1] %= self.modulus
+
+    def _expand(self, m: int) -> None:
+        self.coef[m - 1] += self.k * self.coef[m]
+        if m % 2 == 0:
+            self.coef[m // 2] -= self.coef[m]
+        if self.modulus:
+            self.coef[m - 1] %= self.modulus
+            self.coef[m // 2] %= self.modulus
+
+    def _undo_expand(self, m: int) -> None:
+        if m % 2 == 0:
+            self.coef[m // 2] += self.coef[m]
+        self.coef[m - 1] -= self.k * self.coef[m]
+        if self.modulus:
+            self.coef[m - 1] %= self.modulus
+            self.coef[m // 2] %= self.modulus
+
+    def _move_coef(self, u_len: int) -> None:
+        n = self.n
+        if self.coef_len is None:
+            cached = None if self.modulus else tables.coefficients(self.k, n)
+            if cached is not None:
+                # moved in place below, so decoded into a list of our own
+                self.coef = list(cached)
+                self.coef_len = 1
+            else:
+                self.coef = [0] * (n + 1)
+                self.coef[n] = 1
+                for m in range(n, 2 * u_len, -1):
+                    self._expand(m)
+                self.coef_len = u_len
+        if self.coef_len != u_len:
+            curr = self.coef_len
+            while curr < u_len:
+                for m in (2 * curr + 1, 2 * curr + 2):
+                    if m <= n:
+                        self._undo_expand(m)
+                curr += 1
+            while curr > u_len:
+                for m in (2 * curr, 2 * curr - 1):
+                    if m <= n:
+                        self._expand(m)
+                curr -= 1
+        self.coef_len = u_len
+
+    def _prepare(self, u_len: int) -> None:
+        """coefficients and the part of U(n) that does not depend on c"""
+        self._move_coef(u_len)
+        pw, horner, coef = self.pw, self.horner, self.coef
+        base = 0
+        for m in range(u_len, 2 * u_len):
+            if coef[m]:
+                base += coef[m] * (pw[m - u_len] - horner[m - u_len])
+        base += coef[2 * u_len] * (pw[u_len] - horner[u_len - 1] * self.k)
+        self.base = base % self.modulus if self.modulus else base
+        self.base_len = u_len
+
+    def B(self, u_len: int, c: int) -> int:
+        n = self.n
+        assert 1 <= u_len <= n and u_len - 1 <= self.wt.n
+        self._sync()
+        # periods groups of wt.seq[:u_len - 1] + [c], in reused buffers
+        steps, ends = self.steps, self.ends
+        del steps[:], ends[:]
+        periods = self.wt.periods
+        extend_periods(
+            self.wt.seq,
+            u_len - 1,
+            c,
+            periods.steps,
+            periods.ends,
+            periods.offsets[u_len - 1],
+            periods.offsets[u_len],
+            steps,
+            ends,
+        )
+        a_last = int(len(steps) == 0)
+        sum_queries = self.sum_queries
+        # borders of the extended word, shared by all the sum queries below
+        sum_queries.borders = [
+            ArithSequence(u_len - end, u_len - step, step)
+            for step, end in zip(steps, ends)
+        ]
+        if n <= 2 * u_len:
+            # no U recurrence, B(n) is given directly by the precalc_B formula
+            if n == 2 * u_len:
+                b1 = self.horner[u_len - 1] * self.k + a_last
+            else:
+                b1 = self.horner[n - u_len]
+            result = b1
+            if steps:
+                result += sum_queries.sum(n - u_len + 1, n // 2, n - u_len)
+            return result % self.modulus if self.modulus else result
+
+        if self.base_len != u_len:
+            self._prepare(u_len)
+        coef = self.coef
+        u_n = self.base - coef[2 * u_len] * a_last
+        # without borders all the sum queries are 0
+        for m in range(u_len, 2 * u_len if steps else u_len):
+            if coef[m]:
+                b2 = sum_queries.sum(m - u_len + 1, m // 2, m - u_len)
+                if b2:
+                    u_n -= coef[m] * b2
+        result = self.pw[n - u_len] - u_n
+        return result % self.modulus if self.modulus else result
+
+    def U(self, u_len: int, c: int) -> int:
+        result = self.pw[self.n - u_len] - self.B(u_len, c)
+        return result % self.modulus if self.modulus else result
+
+
+def _rank_b_terms(
+    w: Sequence[int],
+    n: int,
+    k: int,
+    start: int,
+    stop: int,
+    modulus: Optional[int] = None,
+) -> int:
+    """sum of the terms of positions start <= i < stop of the bordered rank of w"""
+    result = 0
+    wt = WordTool(w, k)
+    engine = BEngine(wt, n, modulus)
+    for i in range(start, stop):
+        y_i = wt.Y(i)
+        y_prim_len, y_prim_repr = wt.Y_prim(i)
+
+        for c in y_i:
+            result += engine.B(i + 1, c)
+        if y_prim_len != 0:
+            result += y_prim_len * engine.B(i + 1, y_prim_repr)
+        if modulus:
+            result %= modulus
+    return result
+
+
+class _WordKey:
+    """lexicographic sort key of a word of any sequence type, compared in place
+    (memoryviews are not orderable, and tuple(w) would copy the word)"""
+
+    __slots__ = ("w",)
+
+    def __init__(self, w: Sequence[int]) -> None:
+        self.w = w
+
+    def __lt__(self, other: "_WordKey") -> bool:
+        a, b = self.w, other.w
+        for i in range(min(len(a), len(b))):
+            if a[i] != b[i]:
+                return a[i] < b[i]
+        return len(a) < len(b)
+
+
 class FasterRankerUnranker(BaseRankerUnranker):
-    def _rank_b(self, w: list[int], n: int, k: int) -> int:
-        result = 0
-        wt = WordTool(list(w[1:]), k)
-        for i in range(0, n):
-            y_i = wt.Y(i)
-            y_prim_len, y_prim_repr = wt.Y_prim(i)
+    def __init__(self, workers: int = 1, modular: bool = False) -> None:
+        """workers > 1 splits positions of rank between a pool of processes,
+        modular computes ranks modulo word-sized primes and combines them with CRT"""
+        self.workers = workers
+        self.pool = PositionsPool(workers) if workers > 1 else None
+        self.modular = modular
 
-            for c in y_i:
-                result += wt.B(i + 1, c, n)
-            if y_prim_len != 0:
-                result += y_prim_len * wt.B(i + 1, y_prim_repr, n)
+    def close(self) -> None:
+        """shuts down the worker processes, if any were started"""
+        if self.pool is not None:
+            self.pool.close()
 
-        return result + 1
+    def _rank_b(self, seq: Sequence[int], n: int, k: int) -> int:
+        if self.pool is not None and n >= PARALLEL_MIN_LENGTH:
+            # a position costs about as many sum queries as the shorter side
+            ranges = split_positions(
+                0, n, 4 * self.workers, cost=lambda i: min(i, n - i) + 1
+            )
+            return self.pool.sum(_rank_b_terms, tuple(seq), n, k, ranges) + 1
+        return _rank_b_terms(seq, n, k, 0, n) + 1
 
-    def _rank_u(self, w: list[int], n: int, k: int) -> int:
+    def _lex_rank(self, seq: Sequence[int], k: int) -> int:
+        """number of all words smaller than seq"""
         result = 0
-        for i in range(1, n + 1):
-            result += (w[i] - 1) * (k ** (n - i))
-        return 2 + result - self._rank_b(w, n, k)
+        for c in seq:
+            result = result * k + c - 1
+        return result
+
+    def _rank_u(self, seq: Sequence[int], n: int, k: int) -> int:
+        return 2 + self._lex_rank(seq, k) - self._rank_b(seq, n, k)
+
+    def _rank_sorted(
+        self, words: list[Sequence[int]], n: int, k: int, bordered: bool
+    ) -> list[int]:
+        """ranks of lexicographically sorted words of length n
+
+        Consecutive words are consecutive leaves of the prefix trie of all the words,
+        so the word in the WordTool is only rolled back to the longest common prefix.
+        B values of a trie node are computed once and shared by all its children.
+        The words are only indexed, never copied."""
+        wt = WordTool([], k)
+        engine = BEngine(wt, n)
+        # all indexed by prefix length of the current word
+        prefix_rank = [0]
+        prefix_lex = [0]
+        node_values = [None]
+        result = []
+        for w in words:
+            lcp = 0
+            while lcp < wt.n and wt.seq[lcp] == w[lcp]:
+                lcp += 1
+            while wt.n > lcp:
+                engine.pop()
+                prefix_rank.pop()
+                prefix_lex.pop()
+                node_values.pop()
+            for i in range(lcp, n):
+                if node_values[i] is None:
+                    X = wt.X(i)
+                    partial_sums = [0]
+                    for c in X:
+                        partial_sums.append(partial_sums[-1] + engine.B(i + 1, c))
+                    _, X_prim_repr = wt.X_prim(i)
+                    default_value = None
+                    if X_prim_repr is not None:
+                        default_value = engine.B(i + 1, X_prim_repr)
+                    node_values[i] = (X, partial_sums, default_value)
+                X, partial_sums, default_value = node_values[i]
+                c = w[i]
+                j = bisect_left(X, c)  # characters of X smaller than c
+                value = partial_sums[j]
+                if c - 1 - j > 0:
+                    value += (c - 1 - j) * default_value
+                prefix_rank.append(prefix_rank[-1] + value)
+                prefix_lex.append(prefix_lex[-1] * k + c - 1)
+                engine.append(c)
+                node_values.append(None)
+            rank_b = prefix_rank[n] + 1
+            result.append(rank_b if bordered else 2 + prefix_lex[n] - rank_b)
+        return result
+
+    def rank_mod(self, seq: list[int], k: int, bordered: bool, modulus: int) -> int:
+        """rank modulo modulus, computed without big ints"""
+        n = len(seq)
+        rank_b = (_rank_b_terms(seq, n, k, 0, n, modulus) + 1) % modulus
+        if bordered:
+            return rank_b
+        lex_rank = 0
+        for c in seq:
+            lex_rank = (lex_rank * k + c - 1) % modulus
+        return (2 + lex_rank - rank_b) % modulus
 
     def rank(self, seq: list[int], k: int, bordered: bool) -> int:
         n = len(seq)
-        w = [0] + list(seq)
+        if self.modular:
+            # all ranks are at most k**n
+            primes = primes_for_bound(k**n)
+            residues = [self.rank_mod(seq, k, bordered, p) for p in primes]
+            return crt(residues, primes)
         if bordered:
-            return self._rank_b(w, n, k)
+            return self._rank_b(seq, n, k)
         else:
-            return self._rank_u(w, n, k)
+            return self._rank_u(seq, n, k)
 
-    def unrank(self, r: int, n: int, k: int, bordered: bool) -> tuple[int]:
-        w = []
-        for i in range(1, n + 1):
-            wt = WordTool(w, k)
-            X = wt.X(i - 1)
-
-            B_values = {}
-            for c in X:
-                B_values[c] = wt.B(i, c, n) if bordered else wt.U(i, c, n)
-
-            _, X_prim_repr = wt.X_prim(i - 1)
-            B_prim_value = None
-            if X_prim_repr is not None:
-                B_prim_value = (
-                    wt.B(i, X_prim_repr, n) if bordered else wt.U(i, X_prim_repr, n)
-                )
+    def rank_many(
+        self, words: Iterable[Sequence[int]], k: int, bordered: bool
+    ) -> list[int]:
+        """ranks of many words, equal to [self.rank(w, k, bordered) for w in words]
 
+        Words are organised into a prefix trie, so the work is proportional to the
+        number of distinct prefixes rather than to the total number of letters.
+        Words are not copied: memoryviews (e.g. words of a corpus) are sorted and
+        ranked in place."""
+        words = list(words)
+        by_length = defaultdict(list)
+        for idx, w in enumerate(words):
+            by_length[len(w)].append(idx)
+        result = [None] * len(words)
+        for n, group in by_length.items():
+            if all(type(words[idx]) is tuple for idx in group):
+                group.sort(key=words.__getitem__)
+            else:
+                group.sort(key=lambda idx: _WordKey(words[idx]))
+            ranks = self._rank_sorted([words[idx] for idx in group], n, k, bordered)
+            for idx, r in zip(group, ranks):
+                result[idx] = r
+        return result
+
+    def _child_values(
+        self, wt: WordTool, count: Callable[[int, int], int]
+    ) -> tuple[dict[int, int], Optional[int]]:
+        """counts of the subtrees of the current word wt.seq: values for characters
+        extending a border and a default value for all the other characters"""
+        i = wt.n
+        B_values = {}
+        for c in wt.X(i):
+            B_values[c] = count(i + 1, c)
+
+        _, X_prim_repr = wt.X_prim(i)
+        B_prim_value = None
+        if X_prim_repr is not None:
+            B_prim_value = count(i + 1, X_prim_repr)
+        return B_values, B_prim_value
+
+    def unrank(self, r: int, n: int, k: int, bordered: bool) -> tuple[int]:
+        wt = WordTool([], k)
+        engine = BEngine(wt, n)
+        count = engine.B if bordered else engine.U
+        for _ in range(n):
+            B_values, B_prim_value = self._child_values(wt, count)
             (r, c) = implicit_problem(B_values, B_prim_value, k, r)
-            w.append(c)
+            wt.append(c)
+        assert r == 1, f"invalid final rank: {r}"
+        return tuple(wt.seq)
+
+    def _next_child(
+        self, values: tuple[dict[int, int], Optional[int]], c: int, k: int
+    ) -> Optional[int]:
+        """the smallest character greater than c with a non-empty subtree"""
+        B_values, B_prim_value = values
+        result = None
+        for x in sorted(B_values):
+            if x > c and B_values[x] > 0:
+                result = x
+                break
+        if B_prim_value:
+            x = c + 1
+            while x in B_values:
+                x += 1
+            if x <= k and (result is None or x < result):
+                result = x
+        return result
+
+    def iter_from(self, r: int, n: int, k: int, bordered: bool) -> Iterator[tuple[int]]:
+        """words of rank r, r + 1, r + 2, ... (in lexicographic order)
+
+        Unranks r once, then every next word is found by backtracking to the deepest
+        node with a non-empty subtree to the right and descending to its leftmost
+        leaf. Counts of the nodes on the current path are kept, so subtrees without
+        words of the requested class are skipped without visiting them."""
+        wt = WordTool([], k)
+        engine = BEngine(wt, n)
+        count = engine.B if bordered else engine.U
+        node_values = []  # node_values[i] - counts of the children of wt.seq[:i]
+        for _ in range(n):
+            node_values.append(self._child_values(wt, count))
+            (r, c) = implicit_problem(*node_values[-1], k, r)
+            engine.append(c)
         assert r == 1, f"invalid final rank: {r}"
-        return tuple(w)
+        yield tuple(wt.seq)
+
+        while True:
+            next_c = None
+            while next_c is None:
+                if wt.n == 0:
+                    return
+                c = engine.pop()
+                next_c = self._next_child(node_values[wt.n], c, k)
+                if next_c is None:
+                    node_values.pop()
+            engine.append(next_c)
+            while wt.n < n:
+                node_values.append(self._child_values(wt, count))
+                engine.append(self._next_child(node_values[-1], 0, k))
+            yield tuple(wt.seq)
+
+    def unrank_many(
+        self, ranks: Iterable[int], n: int, k: int, bordered: bool
+    ) -> list[tuple[int]]:
+        """words of the given ranks, equal to [self.unrank(r, ...) for r in ranks]
+
+        Ranks are sorted and the lexicographic tree is descended once: at every node
+        the set of ranks is split between the children, and the counts of the
+        children are shared by all the ranks passing through the node."""
+        wt = WordTool([], k)
+        engine = BEngine(wt, n)
+        count = engine.B if bordered else engine.U
+        items = sorted((r, idx) for idx, r in enumerate(ranks))
+        result = [None] * len(items)
+        # explicit stack of (character, ranks of the subtree), POP closes a subtree
+        POP = 0
+        stack = [(None, items)] if items else []
+        while stack:
+            c, items = stack.pop()
+            if c == POP:
+                engine.pop()
+                continue
+            if c is not None:
+                engine.append(c)
+                stack.append((POP, None))
+            if wt.n == n:
+                for r, idx in items:
+                    assert r == 1, f"invalid final rank: {r}"
+                    result[idx] = tuple(wt.seq)
+                continue
+            B_values, B_prim_value = self._child_values(wt, count)
+            children = []
+            for r, idx in items:
+                new_r, c = implicit_problem(B_values, B_prim_value, k, r)
+                if not children or children[-1][0] != c:
+                    children.append((c, []))
+                children[-1][1].append((new_r, idx))
+            stack.extend(reversed(children))
+        return result
@@ -22,22 +22,36 @@ class NaiveSumQueries(AbstractSumQueries):
 class SumQueries(AbstractSumQueries):
     """Actual implementation of Sum Queries"""
 
-    def __init__(self, a: list[int], borders: list[ArithSequence]) -> None:
+    def __init__(
+        self,
+        a: list[int],
+        borders: list[ArithSequence],
+        cache_sum_a: Optional[dict[tuple[int, int], int]] = None,
+    ) -> None:
         self.a = a
         self.borders = borders
-        self.cache_sum_a = dict()
+        # calc_sum_a depends only on a, so the cache can be shared between
+        # queries over the same a (and different borders)
+        self.cache_sum_a = dict() if cache_sum_a is None else cache_sum_a
 
     def calc_sum_a(self, i: int, delta: int) -> int:
+        """a[i] + a[i - delta] + a[i - 2*delta] + ... (positive indices only)"""
+        # walk down to a cached (or trivial) value, then fill the cache upwards
+        stack = []
+        while i > delta and (i, delta) not in self.cache_sum_a:
+            stack.append(i)
+            i -= delta
         if i <= 0:
-            return 0
+            result = 0
         elif i <= delta:
-            return self.a[i]
+            result = self.a[i]
         else:
-            if (i, delta) not in self.cache_sum_a:
-                self.cache_sum_a[(i, delta)] = self.a[i] + self.calc_sum_a(
-                    i - delta, delta
-                )
-            return self.cache_sum_a[(i, delta)]
+            result = self.cache_sum_a[(i, delta)]
+        while stack:
+            i = stack.pop()
+            result += self.a[i]
+            self.cache_sum_a[(i, delta)] = result
+        return result
 
     def sum(self, p: int, q: int, d: int) -> int:
         if p > q:
@@ -51,6 +65,58 @@ class SumQueries(AbstractSumQueries):
         return result
 
 
+class ArraySumQueries(AbstractSumQueries):
+    """Sum Queries backed by one dense strided prefix-sum array per border step
+
+    tables[step][i] = a[i] + a[i - step] + a[i - 2 * step] + ... (positive indices),
+    so every query costs O(#border groups) list lookups. Tables are built lazily,
+    only for steps of groups with at least two elements in the queried range."""
+
+    def __init__(
+        self,
+        a: list[int],
+        borders: list[ArithSequence],
+        tables: Optional[dict[int, list[int]]] = None,
+    ) -> None:
+        self.a = a
+        self.borders = borders
+        # tables depend only on a, so they can be shared between queries
+        self.tables = dict() if tables is None else tables
+
+    def table(self, step: int) -> list[int]:
+        table = self.tables.get(step)
+        if table is None:
+            table = self.tables[step] = []
+        a = self.a
+        for i in range(len(table), len(a)):
+            table.append(a[i] + table[i - step] if i > step else a[i])
+        return table
+
+    def sum(self, p: int, q: int, d: int) -> int:
+        if p > q:
+            return 0
+        a = self.a
+        lo, hi = p - d, q - d
+        result = 0
+        for seq in self.borders:
+            start, step = seq.start, seq.step
+            end = seq.end if seq.end < hi else hi
+            first = (
+                start if lo <= start else start + step * ((lo - start - 1) // step + 1)
+            )
+            if first > end:
+                continue
+            last = start + ((end - start) // step) * step
+            if first == last:
+                result += a[first + d]
+            else:
+                table = self.table(step)
+                result += table[last + d]
+                if first - step + d > 0:
+                    result -= table[first - step + d]
+        return result
+
+
 def implicit_problem_linear(
     values: dict[int, int], default_value: Optional[int], k: int, r: int
 ) -> tuple[int, int]:
@@ -69,6 +135,16 @@ def implicit_problem_linear(
     assert False  # unreachable
 
 
+def first_missing(chars: list[int]) -> int:
+    """the smallest character not in chars (sorted, distinct), in O(len(chars))"""
+    c = 1
+    for x in chars:
+        if x != c:
+            break
+        c += 1
+    return c
+
+
 def implicit_problem(
     values: dict[int, int], default_value: Optional[int], k: int, r: int
 ) -> tuple[int, int]:
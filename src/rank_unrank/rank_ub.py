@@ -1,4 +1,8 @@
+from typing import Callable, Optional
+
 from rank_unrank.base import AbstractRankerUnranker
+from rank_unrank.parallel import PARALLEL_MIN_LENGTH, PositionsPool, split_positions
+from rank_unrank.rank_fast_subproblems import first_missing
 
 
 ###############
@@ -59,7 +63,206 @@ def populateBorderArrays(w: list[int], n: int):
     return a, b
 
 
+class BorderArrays:
+    """The KMP failure array PBA and the a array of w (a[i] = 1 if w[1..i] is
+    unbordered), extended one character at a time."""
+
+    def __init__(self) -> None:
+        self.w = [0]
+        self.PBA = [0]
+        self.a = [0]
+
+    def longestBorder(self, c: int) -> int:
+        """length of the longest border of w[1..p-1]c"""
+        w, PBA = self.w, self.PBA
+        if len(w) == 1:
+            return 0
+        length = PBA[-1]
+        while length > 0 and c != w[length + 1]:
+            length = PBA[length]
+        if c == w[length + 1]:
+            length += 1
+        return length
+
+    def append(self, c: int) -> None:
+        length = self.longestBorder(c)
+        self.w.append(c)
+        self.PBA.append(length)
+        self.a.append(int(length == 0))
+
+    def extendingChars(self) -> list[int]:
+        """characters c such that w[1..p-1]c is bordered (sorted); for all the
+        other characters B is the same"""
+        w, PBA = self.w, self.PBA
+        if len(w) == 1:
+            return []
+        result = {w[1]}
+        length = PBA[-1]
+        while length > 0:
+            result.add(w[length + 1])
+            length = PBA[length]
+        return sorted(result)
+
+
+class IncrementalB(BorderArrays):
+    """B(a, b, n, p, k) for all the candidate prefixes w[1..p-1]c of a single word,
+    with w extended one character at a time.
+
+    The KMP failure array, the a array and its Horner sums of w are extended
+    incrementally and shared by all the candidates, which only differ in their
+    last character. saveB[j] for p <= j <= 2p is read from the borders of
+    w[1..p-1]c, and for j > 2p it follows from
+
+        saveB[j] = k^(j-2p) * H(p) + S(j),
+        S(j) = k^2 * S(j-2) + (k^(j//2-p) - saveB[j//2]) * k^(j%2)   (S = 0 for j <= 2p+1)
+
+    where H(m) = sum(a[i] * k^(m-i) for 1 <= i <= m), so a single B costs
+    O(p * #borders + n) instead of O(n^2)."""
+
+    def __init__(self, n: int, k: int) -> None:
+        super().__init__()
+        self.n = n
+        self.k = k
+        self.pw = [1] * (n + 1)
+        for e in range(1, n + 1):
+            self.pw[e] = self.pw[e - 1] * k
+        self.H = [0]
+
+    def append(self, c: int) -> None:
+        super().append(c)
+        self.H.append(self.H[-1] * self.k + self.a[-1])
+
+    def _direct(self, c: int) -> tuple[int, Callable[[int], int]]:
+        """H(p) of w[1..p-1]c and B(a, b, j, p, k) for p <= j <= 2p"""
+        k = self.k
+        longest = self.longestBorder(c)
+        a_p = int(longest == 0)
+        a = self.a + [a_p]
+        H_p = self.H[-1] * k + a_p
+        p = len(a) - 1
+        borders = []
+        length = longest
+        while length > 0:
+            borders.append(length)
+            length = self.PBA[length]
+
+        def direct(j: int) -> int:
+            d = j - p
+            total = self.H[d] if d < p else H_p
+            for t in borders:
+                if t + d <= j // 2:
+                    total += a[t + d]
+            return total
+
+        return H_p, direct
+
+    def B(self, c: int) -> int:
+        """equal to B(a, b, n, p, k) for (a, b) = populateBorderArrays(w[1..p-1]c, p)"""
+        if self.n <= 2 * len(self.w):
+            return self._direct(c)[1](self.n)
+        return self.B_table(c)[self.n]
+
+    def B_table(self, c: int) -> list[int]:
+        """saveB[j] = B(a, b, j, p, k) for all p <= j <= n (entries j < p are 0)"""
+        n, k, pw = self.n, self.k, self.pw
+        p = len(self.w)
+        H_p, direct = self._direct(c)
+        saveB = [0] * (n + 1)
+        for j in range(p, min(2 * p, n) + 1):
+            saveB[j] = direct(j)
+        S_prev, S = 0, 0  # S(j - 2), S(j - 1)
+        for j in range(2 * p + 1, n + 1):
+            if j >= 2 * p + 2:
+                i = j // 2
+                S_prev, S = S, k * k * S_prev + (pw[i - p] - saveB[i]) * pw[j % 2]
+            else:
+                S_prev, S = S, 0
+            saveB[j] = pw[j - 2 * p] * H_p + S
+        return saveB
+
+    def counts(self) -> tuple[dict[int, int], Optional[int]]:
+        """B of every extending character and of all the other characters"""
+        chars = self.extendingChars()
+        values = {c: self.B(c) for c in chars}
+        default_value = None
+        if len(chars) < self.k:
+            default_value = self.B(first_missing(chars))
+        return values, default_value
+
+
+def rankB_terms(w: list[int], n: int, k: int, start: int, stop: int) -> int:
+    incremental = IncrementalB(n, k)
+    for i in range(1, start):
+        incremental.append(w[i])
+    result = 0
+    for i in range(start, stop):
+        save = w[i]
+        chars = [c for c in incremental.extendingChars() if c < save]
+        for c in chars:
+            result += incremental.B(c)
+        # all the other smaller characters are counted at once
+        others = save - 1 - len(chars)
+        if others > 0:
+            result += others * incremental.B(first_missing(chars))
+        incremental.append(save)
+    return result
+
+
 def rankB(w: list[int], n: int, k: int):
+    return rankB_terms(w, n, k, 1, n + 1) + 1
+
+
+def rankU(w: list[int], n: int, k: int, rank_b: Optional[int] = None):
+    result = 0
+    for i in range(1, n + 1):
+        result += (w[i] - 1) * power(k, n - i)
+    if rank_b is None:
+        rank_b = rankB(w, n, k)
+    return 2 + result - rank_b
+
+
+def selectChar(
+    values: dict[int, int], default_value: Optional[int], k: int, rank: int
+) -> tuple[int, int]:
+    """(rank within the words starting with c, c) for the character c holding
+    the rank-th word, when values[c] (or default_value) words start with c"""
+    c = 1
+    for x in sorted(values):
+        if x > c:
+            # characters c..x-1 all hold default_value words
+            if (x - c) * default_value >= rank:
+                break
+            rank -= (x - c) * default_value
+        if values[x] >= rank:
+            return rank, x
+        rank -= values[x]
+        c = x + 1
+    assert default_value, "rank out of range"
+    skip = (rank - 1) // default_value
+    assert c + skip <= k, "rank out of range"
+    return rank - skip * default_value, c + skip
+
+
+def unrank(rank: int, n: int, k: int, isB: bool) -> tuple[int]:
+    incremental = IncrementalB(n, k)
+    for i in range(1, n + 1):
+        values, default_value = incremental.counts()
+        if not isB:
+            values = {c: power(k, n - i) - x for c, x in values.items()}
+            if default_value is not None:
+                default_value = power(k, n - i) - default_value
+        rank, c = selectChar(values, default_value, k, rank)
+        incremental.append(c)
+    assert rank == 1, f"invalid final rank: {rank}"
+    return tuple(incremental.w[1:])
+
+
+# Gabric's original rank and unrank, B is recomputed for every prefix; kept as
+# the reference for the incremental versions above
+
+
+def rankB_original(w: list[int], n: int, k: int):
+    w = list(w)
     result = 0
     for i in range(1, n + 1):
         save = w[i]
@@ -71,14 +274,14 @@ def rankB(w: list[int], n: int, k: int):
     return result + 1
 
 
-def rankU(w: list[int], n: int, k: int):
+def rankU_original(w: list[int], n: int, k: int):
     result = 0
     for i in range(1, n + 1):
         result += (w[i] - 1) * power(k, n - i)
-    return 2 + result - rankB(w, n, k)
+    return 2 + result - rankB_original(w, n, k)
 
 
-def unrank(rank: int, n: int, k: int, isB: bool) -> tuple[int]:
+def unrank_original(rank: int, n: int, k: int, isB: bool) -> tuple[int]:
     w = [1] * (n + 1)
     for i in range(1, n + 1):
         left = 1
@@ -88,9 +291,9 @@ def unrank(rank: int, n: int, k: int, isB: bool) -> tuple[int]:
             mid = (left + right + 1) // 2
             w[i] = mid
             if isB:
-                currRank = rankB(w, n, k)
+                currRank = rankB_original(w, n, k)
             else:
-                currRank = rankU(w, n, k)
+                currRank = rankU_original(w, n, k)
             if currRank <= rank:
                 left = mid
             else:
@@ -103,9 +306,23 @@ def unrank(rank: int, n: int, k: int, isB: bool) -> tuple[int]:
 
 
 class UBRankerUnranker(AbstractRankerUnranker):
+    def __init__(self, workers: int = 1) -> None:
+        """workers > 1 splits positions of rank between a pool of processes"""
+        self.workers = workers
+        self.pool = PositionsPool(workers) if workers > 1 else None
+
+    def close(self) -> None:
+        """shuts down the worker processes, if any were started"""
+        if self.pool is not None:
+            self.pool.close()
+
     def rank(self, seq: list[int], k: int, bordered: bool) -> int:
         w = [0] + list(seq)
         n = len(seq)
+        if self.pool is not None and n >= PARALLEL_MIN_LENGTH:
+            ranges = split_positions(1, n + 1, 4 * self.workers)
+            rank_b = self.pool.sum(rankB_terms, tuple(w), n, k, ranges) + 1
+            return rank_b if bordered else rankU(w, n, k, rank_b)
         if bordered:
             return rankB(w, n, k)
         else:
@@ -0,0 +1,169 @@
+"""
+Uniform random sampling of bordered and unbordered words.
+
+The shortest border of a word is unbordered, and conversely for every unbordered
+u with 2 * len(u) <= n and every z, u + z + u is a word with the shortest border u.
+So the number of bordered words of length n with the shortest border of length L
+is U(L) * k**(n - 2L), and a uniform bordered word is drawn by choosing L with
+these weights, then a uniform unbordered u of length L and a uniform z.
+
+Unbordered words are a dense class (more than 26% of all the words, for every
+k >= 2 and n), so they are drawn by rejection: uniform words are drawn until an
+unbordered one is found. For k < 256 the words are generated and tested as bytes,
+for k <= 2^32 letters are decoded from random bytes 16 or 32 bits at a time.
+"""
+
+import bisect
+import functools
+import random
+import sys
+from array import array
+from typing import Optional
+
+from rank_unrank import tables
+
+# short borders are compared directly, longer ones are located with bytes.find
+_HEAD = 8
+
+# array typecodes of unsigned ints of 16 and 32 bits
+_TYPECODES = [(16, "H"), (32, "I" if array("I").itemsize == 4 else "L")]
+
+
+def _bytes_bordered(w: bytes) -> bool:
+    """is_bordered for a word given as bytes"""
+    n = len(w)
+    h = n // 2
+    m = min(_HEAD, h + 1)
+    for length in range(1, m):
+        if w.endswith(w[:length]):
+            return True
+    if m > h:
+        return False
+    head = w[:m]
+    j = w.find(head, n - h)
+    while j != -1:
+        if w.startswith(w[j:]):
+            return True
+        j = w.find(head, j + 1)
+    return False
+
+
+def _seq_bordered(w: list[int]) -> bool:
+    """is_bordered, fast on random words over large alphabets (candidate borders
+    are the prefixes ending with the last letter, located with list.index)"""
+    n = len(w)
+    half = n // 2
+    first, last = w[0], w[-1]
+    end = 0
+    while True:
+        try:
+            end = w.index(last, end, half) + 1
+        except ValueError:
+            return False
+        if w[n - end] == first and w[:end] == w[n - end :]:
+            return True
+
+
+@functools.lru_cache(maxsize=8)
+def _letter_table(k: int) -> list[int]:
+    """letter of every 16-bit value, 0 for the values to be dropped"""
+    limit = 65536 - 65536 % k
+    return [x % k + 1 if x < limit else 0 for x in range(65536)]
+
+
+class _Letters:
+    """uniform words over {1..k} from a random generator"""
+
+    def __init__(self, k: int, rng: random.Random) -> None:
+        self.k = k
+        self.rng = rng
+        self.as_bytes = k <= 255
+        self.typecode = None
+        if self.as_bytes:
+            # bytes below limit are mapped uniformly to 1..k, the others dropped
+            limit = 256 - 256 % k
+            self.table = bytes(b % k + 1 for b in range(256))
+            self.delete = bytes(range(limit, 256))
+        else:
+            for bits, typecode in _TYPECODES:
+                if k <= 1 << bits:
+                    # the same with 16 or 32-bit values
+                    self.typecode = typecode
+                    self.itemsize = bits // 8
+                    self.limit = (1 << bits) - (1 << bits) % k
+                    break
+            if self.typecode == "H":
+                self.letter_table = _letter_table(k)
+
+    def word(self, n: int):
+        if not self.as_bytes:
+            if self.typecode is None:
+                randbelow, k = self.rng.randrange, self.k
+                return [randbelow(k) + 1 for _ in range(n)]
+            return self._wide_word(n)
+        result = b""
+        while len(result) < n:
+            data = self.rng.randbytes(n - len(result) + 16)
+            result += data.translate(self.table, self.delete)
+        return result[:n]
+
+    def _wide_word(self, n: int) -> list[int]:
+        k, limit = self.k, self.limit
+        result = []
+        while len(result) < n:
+            count = n - len(result) + 16
+            data = array(self.typecode, self.rng.randbytes(count * self.itemsize))
+            if sys.byteorder != "little":
+                data.byteswap()  # the same words from a seed on every platform
+            if self.typecode == "H":
+                result += filter(None, map(self.letter_table.__getitem__, data))
+            else:
+                result += [x % k + 1 for x in data if x < limit]
+        del result[n:]
+        return result
+
+    def unbordered(self, n: int):
+        is_bordered = _bytes_bordered if self.as_bytes else _seq_bordered
+        while True:
+            w = self.word(n)
+            if not is_bordered(w):
+                return w
+
+
+@functools.lru_cache(maxsize=32)
+def _border_weights(n: int, k: int) -> list[int]:
+    """cumulative counts of bordered words of length n by the length L of their
+    shortest border (entry L - 1 counts lengths 1..L)"""
+    U = tables.count_table(k, n // 2, False)
+    result = []
+    total = 0
+    for length in range(1, n // 2 + 1):
+        total += U[length] * k ** (n - 2 * length)
+        result.append(total)
+    return result
+
+
+def sample(
+    n: int, k: int, bordered: bool, count: int, seed: Optional[int] = None
+) -> list[tuple[int]]:
+    """count words drawn uniformly and independently from the bordered (or
+    unbordered) words of length n over {1..k}, reproducible for a given seed"""
+    assert n >= 1 and k >= 1
+    rng = random.Random(seed)
+    letters = _Letters(k, rng)
+    if k == 1:
+        if bordered != (n > 1):
+            raise ValueError(f"no {'' if bordered else 'un'}bordered words")
+        return [(1,) * n] * count
+    if not bordered:
+        return [tuple(letters.unbordered(n)) for _ in range(count)]
+    weights = _border_weights(n, k)
+    if not weights:
+        raise ValueError("no bordered words")
+    result = []
+    for _ in range(count):
+        length = bisect.bisect_right(weights, rng.randrange(weights[-1])) + 1
+        u = letters.unbordered(length)
+        w = u + letters.word(n - 2 * length) + u
+        result.append(tuple(w))
+    return result
@@ -0,0 +1,202 @@
+"""
+Long-running rank/unrank server speaking JSON lines over a Unix socket or TCP.
+
+Every request is a single JSON object on its own line, for example
+
+    {"id": 1, "op": "rank", "k": 2, "seq": [1, 2, 1], "alg": "fast"}
+    {"id": 2, "op": "unrank", "r": 5, "n": 10, "k": 2, "bordered": true}
+    {"id": 3, "op": "rank_many", "k": 2, "words": [[1, 1], [2, 2]], "bordered": true}
+    {"id": 4, "op": "unrank_many", "ranks": [1, 2], "n": 4, "k": 2, "bordered": false}
+    {"id": 5, "op": "count", "n": 10, "k": 2, "bordered": true}
+
+and is answered by one line {"id": ..., "result": ...} or {"id": ..., "error": ...}.
+"alg" defaults to "fast", "bordered" of rank defaults to the class of the word.
+A request line longer than max_line (MAX_LINE by default) is answered by an
+error without an id, and the connection is closed.
+Responses on a connection come in the order of its requests, while the requests
+themselves are evaluated concurrently by a pool of worker processes. Workers keep
+their rankers and the (k, n) tables in memory between requests.
+"""
+
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from rank_unrank import ranker_class, tables
+from rank_unrank.texts import is_bordered
+
+# requests of a single connection that may be in flight at once
+MAX_PENDING = 64
+# longest request line, asyncio streams accept only 64 KiB by default
+MAX_LINE = 64 << 20
+
+_rankers = {}
+
+
+def _ranker(alg: str):
+    if alg not in _rankers:
+        _rankers[alg] = ranker_class(alg)()
+    return _rankers[alg]
+
+
+def _check_word(seq, k: int) -> tuple[int]:
+    seq = tuple(seq)
+    if len(seq) == 0 or min(seq) < 1 or max(seq) > k:
+        raise ValueError(f"word has to be non-empty, over letters 1..{k}")
+    return seq
+
+
+def handle(request: dict):
+    """evaluates a single request, returns the result to be sent back"""
+    ranker = _ranker(request.get("alg", "fast"))
+    op, k = request["op"], request["k"]
+    if op == "rank":
+        seq = _check_word(request["seq"], k)
+        bordered = request.get("bordered")
+        if bordered is None:
+            bordered = is_bordered(seq)
+        return ranker.rank(seq, k, bordered)
+    if op == "unrank":
+        return list(ranker.unrank(request["r"], request["n"], k, request["bordered"]))
+    if op == "rank_many":
+        words = [_check_word(w, k) for w in request["words"]]
+        return ranker.rank_many(words, k, request["bordered"])
+    if op == "unrank_many":
+        words = ranker.unrank_many(
+            request["ranks"], request["n"], k, request["bordered"]
+        )
+        return [list(w) for w in words]
+    if op == "count":
+        n = request["n"]
+        return tables.count_table(k, n, request["bordered"])[n]
+    raise ValueError(f"unknown op {op!r}")
+
+
+def _response_line(response: dict) -> bytes:
+    return json.dumps(response, separators=(",", ":")).encode() + b"\n"
+
+
+def error_line(request_id, e: Exception) -> bytes:
+    """the JSON response line reporting the exception"""
+    return _response_line({"id": request_id, "error": f"{type(e).__name__}: {e}"})
+
+
+def handle_line(line: bytes) -> bytes:
+    """evaluates a JSON request line, returns the JSON response line"""
+    request_id = None
+    try:
+        request = json.loads(line)
+        request_id = request.get("id")
+        return _response_line({"id": request_id, "result": handle(request)})
+    except Exception as e:
+        return error_line(request_id, e)
+
+
+def _init_worker(max_tables: int) -> None:
+    tables.enable_memory_cache(max_tables)
+
+
+class Server:
+    """JSON-lines server, evaluating requests with a pool of worker processes"""
+
+    def __init__(
+        self, workers: int = 1, max_tables: int = 32, max_line: int = MAX_LINE
+    ) -> None:
+        self.workers = workers
+        self.max_tables = max_tables
+        self.max_line = max_line
+        self.executor = None
+        self.server = None
+
+    async def start(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        unix_path: Optional[str] = None,
+    ) -> None:
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.max_tables,),
+        )
+        if unix_path is not None:
+            if os.path.exists(unix_path):
+                os.unlink(unix_path)
+            self.server = await asyncio.start_unix_server(
+                self._connection, path=unix_path, limit=self.max_line
+            )
+        else:
+            self.server = await asyncio.start_server(
+                self._connection, host, port, limit=self.max_line
+            )
+
+    @property
+    def address(self):
+        """(host, port) or the socket path the server listens on"""
+        return self.server.sockets[0].getsockname()
+
+    async def serve_forever(self) -> None:
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+        self.executor.shutdown(cancel_futures=True)
+
+    async def _connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        pending = asyncio.Queue(MAX_PENDING)
+        responder = asyncio.create_task(self._respond(pending, writer))
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    await pending.put(
+                        loop.run_in_executor(self.executor, handle_line, line)
+                    )
+        except (ValueError, asyncio.LimitOverrunError) as e:
+            # a line over max_line, the stream cannot be resynchronised: the
+            # error is sent after the pending responses and the connection closed
+            error = loop.create_future()
+            error.set_result(error_line(None, e))
+            await pending.put(error)
+        finally:
+            await pending.put(None)
+            await responder
+            writer.close()
+
+    async def _respond(self, pending: asyncio.Queue, writer: asyncio.StreamWriter):
+        while (future := await pending.get()) is not None:
+            writer.write(await future)
+            await writer.drain()
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    unix_path: Optional[str] = None,
+    workers: int = 1,
+    max_tables: int = 32,
+    on_ready=None,
+    max_line: int = MAX_LINE,
+) -> None:
+    """runs the server until interrupted, on_ready(address) is called once listening"""
+
+    async def main():
+        server = Server(workers, max_tables, max_line)
+        await server.start(host, port, unix_path)
+        if on_ready is not None:
+            on_ready(server.address)
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
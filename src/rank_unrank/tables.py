@@ -0,0 +1,298 @@
+"""
+Tables that depend only on (k, n), with an opt-in persistent cache on disk.
+
+Cached tables are stored one per file in a versioned binary format:
+
+    header:  magic b"RUTB", version (u16), reserved (u16), k (u64), n (u64),
+             count (u64), kind (16 bytes, NUL padded)
+    offsets: count + 1 little-endian u64 byte offsets, relative to the data
+    data:    every value as signed little-endian bytes (two's complement)
+
+Files are memory-mapped read-only (so the pages are shared between processes)
+and values are decoded lazily, on first access. The cache directory is kept
+under a size cap by removing the least recently used files.
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+from collections import OrderedDict
+from typing import Iterator, Optional, Sequence
+
+MAGIC = b"RUTB"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQQQ16s")
+OFFSET = struct.Struct("<Q")
+
+CACHE_DIR_ENV = "RANK_UNRANK_CACHE_DIR"
+CACHE_MAX_BYTES_ENV = "RANK_UNRANK_CACHE_MAX_BYTES"
+DEFAULT_MAX_BYTES = 1 << 30
+
+
+class TableFormatError(ValueError):
+    pass
+
+
+def write_table(path: str, kind: str, k: int, n: int, values: list[int]) -> None:
+    """writes the table atomically (readers never see a partial file)"""
+    encoded = [
+        x.to_bytes((x.bit_length() + 8) // 8, "little", signed=True) for x in values
+    ]
+    offsets = [0]
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+    header = HEADER.pack(
+        MAGIC, VERSION, 0, k, n, len(values), kind.encode("ascii").ljust(16, b"\0")
+    )
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(b"".join(OFFSET.pack(off) for off in offsets))
+            f.write(b"".join(encoded))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class LazyIntTable:
+    """Read-only, memory-mapped table of ints, decoded on access (the mapping is
+    closed by close() or when the table is no longer referenced)"""
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                raise TableFormatError(f"{path}: truncated header")
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.k, self.n, self.count, kind = HEADER.unpack_from(
+            self.mm, 0
+        )
+        if magic != MAGIC or version != VERSION:
+            raise TableFormatError(f"{path}: not a version {VERSION} table")
+        self.kind = kind.rstrip(b"\0").decode("ascii")
+        self.data_start = HEADER.size + (self.count + 1) * OFFSET.size
+        if len(self.mm) < self.data_start:
+            raise TableFormatError(f"{path}: truncated offsets")
+        end = self.data_start + self._offset(self.count)
+        if len(self.mm) != end:
+            raise TableFormatError(f"{path}: size {len(self.mm)} != {end}")
+
+    def _offset(self, i: int) -> int:
+        return OFFSET.unpack_from(self.mm, HEADER.size + i * OFFSET.size)[0]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i: int) -> int:
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        start = self.data_start + self._offset(i)
+        end = self.data_start + self._offset(i + 1)
+        return int.from_bytes(self.mm[start:end], "little", signed=True)
+
+    def __iter__(self) -> Iterator[int]:
+        for i in range(self.count):
+            yield self[i]
+
+    def close(self) -> None:
+        self.mm.close()
+
+
+class TableCache:
+    """Directory of cached tables with an LRU size cap.
+
+    Recently opened tables are also kept mapped in memory."""
+
+    def __init__(
+        self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES, max_open: int = 64
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_open = max_open
+        self.opened = OrderedDict()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, kind: str, k: int, n: int) -> str:
+        return os.path.join(self.directory, f"{kind}-k{k}-n{n}.v{VERSION}.tbl")
+
+    def get(self, kind: str, k: int, n: int) -> Optional[LazyIntTable]:
+        key = (kind, k, n)
+        if key in self.opened:
+            self.opened.move_to_end(key)
+            return self.opened[key]
+        path = self.path(kind, k, n)
+        try:
+            table = LazyIntTable(path)
+        except (FileNotFoundError, TableFormatError):
+            return None
+        os.utime(path)  # mark as recently used
+        self.opened[key] = table
+        if len(self.opened) > self.max_open:
+            # not closed, callers may still hold it; unmapped once unreferenced
+            self.opened.popitem(last=False)
+        return table
+
+    def put(self, kind: str, k: int, n: int, values: list[int]) -> None:
+        write_table(self.path(kind, k, n), kind, k, n, values)
+        self.evict()
+
+    def evict(self) -> None:
+        """removes least recently used tables until the size cap is met"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".tbl"):
+                try:
+                    st = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def load(self, kind: str, k: int, n: int, compute) -> Sequence[int]:
+        """the cached table as a lazy view of the file, or compute(k, n) stored
+        in the cache (missing, empty and damaged files are rebuilt)"""
+        table = self.get(kind, k, n)
+        if table is not None:
+            return table
+        values = compute(k, n)
+        self.put(kind, k, n, values)
+        return values
+
+
+_cache: Optional[TableCache] = None
+_cache_from_env = False
+
+
+def enable_cache(directory: str, max_bytes: int = DEFAULT_MAX_BYTES) -> TableCache:
+    global _cache, _cache_from_env
+    _cache = TableCache(directory, max_bytes)
+    _cache_from_env = True
+    return _cache
+
+
+def disable_cache() -> None:
+    global _cache, _cache_from_env
+    _cache = None
+    _cache_from_env = True
+
+
+def get_cache() -> Optional[TableCache]:
+    """the enabled cache, by default configured with RANK_UNRANK_CACHE_DIR"""
+    global _cache, _cache_from_env
+    if not _cache_from_env:
+        _cache_from_env = True
+        directory = os.environ.get(CACHE_DIR_ENV)
+        if directory:
+            max_bytes = int(os.environ.get(CACHE_MAX_BYTES_ENV, DEFAULT_MAX_BYTES))
+            _cache = TableCache(directory, max_bytes)
+    return _cache
+
+
+_memory: Optional[OrderedDict] = None
+_memory_max_tables = 0
+
+
+def enable_memory_cache(max_tables: int = 32) -> None:
+    """keeps the last max_tables loaded tables in memory, in front of the disk
+    cache (if any); meant for long-running processes, see rank_unrank.server"""
+    global _memory, _memory_max_tables
+    _memory = OrderedDict()
+    _memory_max_tables = max_tables
+
+
+def disable_memory_cache() -> None:
+    global _memory
+    _memory = None
+
+
+def _load(kind: str, k: int, n: int, compute) -> Sequence[int]:
+    """the table from the memory cache, the disk cache or compute(k, n); the
+    caller gets either its own list or a read-only LazyIntTable"""
+    key = (kind, k, n)
+    if _memory is not None and key in _memory:
+        _memory.move_to_end(key)
+        values = _memory[key]
+        return list(values) if isinstance(values, list) else values
+    cache = get_cache()
+    if cache is None:
+        values = compute(k, n)
+    else:
+        values = cache.load(kind, k, n, compute)
+    if _memory is not None:
+        _memory[key] = values
+        if len(_memory) > _memory_max_tables:
+            _memory.popitem(last=False)
+        return list(values) if isinstance(values, list) else values
+    return values
+
+
+def compute_coefficients(k: int, n: int) -> list[int]:
+    """coef[m] of U(n) = coef[1] * U(1) + coef[2] * U(2) after expanding
+    U(m) = k*U(m-1) - [m even]*U(m/2) for all m > 2 (expanded entries keep the
+    value they had when expanded, see BEngine)"""
+    coef = [0] * (n + 1)
+    coef[n] = 1
+    for m in range(n, 2, -1):
+        coef[m - 1] += k * coef[m]
+        if m % 2 == 0:
+            coef[m // 2] -= coef[m]
+    return coef
+
+
+# k -> (U, B), counts of unbordered and bordered words of all lengths so far,
+# for the COUNT_TABLES_MAX alphabet sizes used most recently
+COUNT_TABLES_MAX = 8
+_count_tables: OrderedDict = OrderedDict()
+
+
+def count_table(k: int, N: int, bordered: bool) -> list[int]:
+    """numbers of bordered (or unbordered) words of length n over k letters, for
+    all n <= N; the tables are kept per k and only extended when a larger N is
+    asked for (the caller gets its own copy)"""
+    if k in _count_tables:
+        _count_tables.move_to_end(k)
+    else:
+        _count_tables[k] = ([1], [0])
+        if len(_count_tables) > COUNT_TABLES_MAX:
+            _count_tables.popitem(last=False)
+    U, B = _count_tables[k]
+    if len(U) <= N:
+        pw = k ** (len(U) - 1)
+        for m in range(len(U), N + 1):
+            pw *= k
+            U.append(k * U[m - 1] - (U[m // 2] if m % 2 == 0 else 0))
+            B.append(pw - U[m])
+    return (B if bordered else U)[: N + 1]
+
+
+def compute_unbordered_counts(k: int, n: int) -> list[int]:
+    """U[m] - number of unbordered words of length m over k letters, m <= n"""
+    return count_table(k, n, False)
+
+
+def coefficients(k: int, n: int) -> Optional[Sequence[int]]:
+    """compute_coefficients(k, n) from the caches, None if both are disabled"""
+    if _memory is None and get_cache() is None:
+        return None
+    return _load("coef", k, n, compute_coefficients)
+
+
+def unbordered_counts(k: int, n: int) -> Sequence[int]:
+    return _load("unbordered", k, n, compute_unbordered_counts)
+
+
+def prewarm(k: int, n: int) -> None:
+    """computes and stores all the tables of (k, n)"""
+    coefficients(k, n)
+    unbordered_counts(k, n)
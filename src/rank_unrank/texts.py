@@ -1,7 +1,8 @@
 from __future__ import annotations
+from array import array
 from dataclasses import dataclass
 import itertools
-from typing import Union, Optional
+from typing import Iterator, MutableSequence, Optional, Sequence, Union
 import random
 
 
@@ -12,12 +13,12 @@ def random_word(n: int, k: int, seed: Optional[int] = None) -> tuple[int]:
 
 
 def fib_word(n: int) -> tuple[int]:
+    prev, curr = (1,), (1, 2)
     if n == 0:
-        return (1,)
-    elif n == 1:
-        return (1, 2)
-    else:
-        return fib_word(n - 1) + fib_word(n - 2)
+        return prev
+    for _ in range(n - 1):
+        prev, curr = curr, curr + prev
+    return curr
 
 
 def is_bordered_naive(seq: list[int]) -> bool:
@@ -72,6 +73,7 @@ def calculate_all_periods_naive(seq: list[int]) -> list[int]:
 
 @dataclass
 class ArithSequence:
+    __slots__ = ("start", "end", "step")
     start: int
     end: int
     step: int
@@ -114,10 +116,16 @@ class ArithSequence:
         assert a <= b
         if self.start > self.end:
             return self
-        diff_a = (a - self.start + self.step - 1) // self.step
-        new_start = self.start + self.step * diff_a if a >= self.start else self.start
+        step = self.step
+        diff_a = (a - self.start + step - 1) // step
+        new_start = self.start + step * diff_a if a >= self.start else self.start
         new_end = b if b <= self.end else self.end
-        return ArithSequence(new_start, new_end, self.step).normalize()
+        if new_start > new_end:
+            return ArithSequence(1, 0, step)
+        # normalized: the end is the last element
+        return ArithSequence(
+            new_start, new_start + ((new_end - new_start) // step) * step, step
+        )
 
     def add_next_step(self):
         return ArithSequence(self.start, self.end + self.step, self.step)
@@ -125,6 +133,7 @@ class ArithSequence:
 
 @dataclass
 class PeriodsGroup:
+    __slots__ = ("periods",)
     periods: list[ArithSequence]
 
     def __iter__(self):
@@ -169,16 +178,114 @@ def calculate_all_periods_single_step(
     return PeriodsGroup(curr_periods)
 
 
-def calculate_all_periods_of_all_prefixes(seq: list[int]) -> list[PeriodsGroup]:
-    n = len(seq)
-    res = [None for _ in range(n + 1)]
-    res[0] = PeriodsGroup([])
-    if n > 0:
-        res[1] = PeriodsGroup([])
-    for i in range(1, n):
-        curr_elem = seq[i]
-        res[i + 1] = calculate_all_periods_single_step(seq, i, curr_elem, res[i])
-    return res
+def extend_periods(
+    seq: Union[list[int], tuple[int]],
+    n: int,
+    curr_elem: int,
+    steps: Sequence[int],
+    ends: Sequence[int],
+    lo: int,
+    hi: int,
+    out_steps: MutableSequence[int],
+    out_ends: MutableSequence[int],
+) -> None:
+    """calculate_all_periods_single_step on parallel arrays: periods groups
+    (steps[j], ends[j]) for lo <= j < hi of seq[:n] give the groups of
+    seq[:n] + (curr_elem,), appended to out_steps, out_ends"""
+    if n == 0:
+        return
+    added = False
+    for step, end in zip(steps[lo:hi], ends[lo:hi]):
+        if curr_elem == seq[n - step]:  # it does extend
+            if end + step == n:
+                end = n
+                added = True
+            out_steps.append(step)
+            out_ends.append(end)
+    if not added and seq[0] == curr_elem:
+        out_steps.append(n)
+        out_ends.append(n)
+
+
+class PeriodsTable:
+    """Periods of all prefixes of a word, stored as parallel integer arrays
+
+    Prefix i has the periods groups ArithSequence(steps[j], ends[j], steps[j])
+    for offsets[i] <= j < offsets[i + 1] (all the periods of a group share the
+    same step, equal to the smallest one). Indexing returns PeriodsGroup objects,
+    the hot paths read the arrays directly."""
+
+    __slots__ = ("steps", "ends", "offsets")
+
+    def __init__(self, seq: Union[list[int], tuple[int]] = ()) -> None:
+        self.steps = array("i")
+        self.ends = array("i")
+        self.offsets = array("i", [0, 0])
+        for i in range(len(seq)):
+            self.append(seq, seq[i])
+
+    @property
+    def n(self) -> int:
+        """length of the word"""
+        return len(self.offsets) - 2
+
+    def append(self, seq: Union[list[int], tuple[int]], c: int) -> None:
+        """adds the periods of seq[:n] + (c,), where n is the current length"""
+        n = self.n
+        extend_periods(
+            seq,
+            n,
+            c,
+            self.steps,
+            self.ends,
+            self.offsets[n],
+            self.offsets[n + 1],
+            self.steps,
+            self.ends,
+        )
+        self.offsets.append(len(self.steps))
+
+    def pop(self) -> None:
+        self.offsets.pop()
+        del self.steps[self.offsets[-1] :]
+        del self.ends[self.offsets[-1] :]
+
+    def count(self, i: int) -> int:
+        """number of periods groups of the prefix of length i"""
+        return self.offsets[i + 1] - self.offsets[i]
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> PeriodsGroup:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return PeriodsGroup(
+            [
+                ArithSequence(self.steps[j], self.ends[j], self.steps[j])
+                for j in range(self.offsets[i], self.offsets[i + 1])
+            ]
+        )
+
+    def __iter__(self) -> Iterator[PeriodsGroup]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PeriodsTable):
+            return NotImplemented
+        return (self.steps, self.ends, self.offsets) == (
+            other.steps,
+            other.ends,
+            other.offsets,
+        )
+
+
+def calculate_all_periods_of_all_prefixes(seq: list[int]) -> PeriodsTable:
+    """periods of every prefix seq[:i], 0 <= i <= len(seq)"""
+    return PeriodsTable(seq)
 
 
 def calc_a_b_naive(seq: list[int]) -> tuple[list[int], list[int]]:
@@ -0,0 +1,75 @@
+"""
+NumPy batch versions of texts functions, for many words of equal length at once.
+
+Words are rows of a 2d integer array of shape (m, n).
+"""
+
+import numpy as np
+
+# rows processed at once, bounds the size of temporary arrays
+CHUNK_SIZE = 1 << 16
+
+
+def calc_pi_batch(words: np.ndarray) -> np.ndarray:
+    """Prefix functions of all rows, pi[r] == calc_pi(words[r])
+
+    KMP runs in lockstep over all the rows: a step of the failure-link loop is a
+    single vectorized operation over the rows that still need it."""
+    words = np.asarray(words)
+    m, n = words.shape
+    pi = np.zeros((m, n), dtype=np.intp)
+    rows = np.arange(m)
+    for i in range(1, n):
+        c = words[:, i]
+        j = pi[:, i - 1].copy()
+        active = np.nonzero((j > 0) & (words[rows, j] != c))[0]
+        while active.size > 0:
+            j[active] = pi[active, j[active] - 1]
+            jj = j[active]
+            active = active[(jj > 0) & (words[active, jj] != c[active])]
+        j += words[rows, j] == c
+        pi[:, i] = j
+    return pi
+
+
+def is_bordered_batch(words: np.ndarray, chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+    """is_bordered of all rows
+
+    For every border length l only the rows with matching first and last letters
+    of the candidate border (about 1/k^2 of them) are compared in full."""
+    words = np.asarray(words)
+    m, n = words.shape
+    result = np.zeros(m, dtype=bool)
+    for start in range(0, m, chunk_size):
+        chunk = words[start : start + chunk_size]
+        bordered = np.zeros(len(chunk), dtype=bool)
+        for length in range(1, n // 2 + 1):
+            cand = np.nonzero(
+                ~bordered
+                & (chunk[:, 0] == chunk[:, n - length])
+                & (chunk[:, length - 1] == chunk[:, n - 1])
+            )[0]
+            if cand.size > 0:
+                prefix = chunk[cand, :length]
+                suffix = chunk[cand, n - length :]
+                bordered[cand[(prefix == suffix).all(axis=1)]] = True
+        result[start : start + chunk_size] = bordered
+    return result
+
+
+def calc_a_b_batch(words: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """calc_a_b of all rows, as two arrays of shape (m, n + 1)"""
+    words = np.asarray(words)
+    m, n = words.shape
+    pi = calc_pi_batch(words)
+    a = np.zeros((m, n + 1), dtype=np.int8)
+    b = np.zeros((m, n + 1), dtype=np.int8)
+    a[:, 1:] = pi == 0
+    if n > 0:
+        j = pi[:, n - 1].copy()
+        active = np.nonzero(j > 0)[0]
+        while active.size > 0:
+            b[active, j[active]] = 1
+            j[active] = pi[active, j[active] - 1]
+            active = active[j[active] > 0]
+    return a, b
@@ -1,11 +1,15 @@
 #!/usr/bin/env python
-import re
+"""
+Command line interface. Only click and the tables are imported up front: the
+ranker of --alg, the batch, sampling, server and instrumentation modules are
+imported by the commands using them, see bench-startup.py.
+"""
+
+import functools
+
 import click
 
-from rank_unrank.base import BaseRankerUnranker
-from rank_unrank.rank_ub import UBRankerUnranker
-from rank_unrank.rank_fast import FasterRankerUnranker
-from rank_unrank.texts import is_bordered
+from rank_unrank import ranker_class, tables
 
 
 @click.group()
@@ -14,33 +18,121 @@ def cli():
 
 
 def parse_seq_from_string(s: str) -> tuple[int]:
-    res = tuple(map(int, re.split(r"[\s,]+", s)))
+    from rank_unrank.batch import parse_seq
+
+    res = parse_seq(s)
     assert len(res) == 0 or min(res) >= 1
     return res
 
 
 def gen_ranker(alg):
-    return {
-        "base": BaseRankerUnranker,
-        "ub": UBRankerUnranker,
-        "fast": FasterRankerUnranker,
-    }[alg]()
+    return ranker_class(alg)()
+
+
+def batch_options(f):
+    """options shared by the --batch modes of rank and unrank"""
+    f = click.option(
+        "--batch",
+        "batch_mode",
+        is_flag=True,
+        help="one word (or rank) per line of the input",
+    )(f)
+    f = click.option("-i", "--input", "input_file", type=click.File("r"), default="-")(
+        f
+    )
+    f = click.option("-j", "--jobs", type=click.IntRange(min=1), default=1)(f)
+    f = click.option(
+        "--chunk-size",
+        type=click.IntRange(min=1),
+        help="lines per chunk, batch.CHUNK_SIZE by default",
+    )(f)
+    f = click.option("--debug/--no-debug", default=None, help="on unless --batch")(f)
+    f = click.option(
+        "--profile",
+        type=click.Choice(["table", "json"]),
+        help="print hot-path stats to stderr (work of --jobs > 1 is not included)",
+    )(f)
+    return f
+
+
+def profile_option(f):
+    """runs the command with instrumentation enabled if --profile is given"""
+
+    @functools.wraps(f)
+    def wrapper(*args, profile, **kwargs):
+        if profile is None:
+            return f(*args, **kwargs)
+        from rank_unrank import instrument
+
+        with instrument.profiled() as stats:
+            try:
+                return f(*args, **kwargs)
+            finally:
+                output = stats.table() if profile == "table" else stats.json()
+                click.echo(output, err=True)
+
+    return wrapper
+
+
+def echo_lines(lines):
+    for line in lines:
+        click.echo(line)
 
 
 @cli.command()
 @click.option("-k", "--alphabet", type=int)
-@click.option("--alg", type=click.Choice(["base", "ub", "fast"]))
-@click.argument("seq", type=str)
-def rank(alphabet, alg, seq):
+@click.option("--alg", type=click.Choice(["base", "ub", "fast"]), default="fast")
+@click.option(
+    "--approx",
+    is_flag=True,
+    help="print the approximate fraction (rank - 1) / count and log2(rank)",
+)
+@click.option("--eps", type=float, help="relative error bound of --approx fractions")
+@batch_options
+@click.argument("seq", type=str, required=False)
+@profile_option
+def rank(
+    alphabet, alg, approx, eps, batch_mode, input_file, jobs, chunk_size, debug, seq
+):
+    if debug is None:
+        debug = not batch_mode
+    if batch_mode:
+        from rank_unrank import batch
+
+        if debug:
+            click.echo(f"[DEBUG] rank --batch k={alphabet} alg={alg} jobs={jobs}")
+        if approx:
+            func, args = batch.approx_rank_chunk, (alphabet, eps)
+        else:
+            func, args = batch.rank_chunk, (alphabet, alg)
+        lines = batch.process(
+            func,
+            input_file,
+            *args,
+            jobs=jobs,
+            chunk_size=chunk_size,
+        )
+        echo_lines(lines)
+        return
+    if seq is None:
+        raise click.UsageError("SEQ is required without --batch")
+    from rank_unrank.texts import is_bordered
+
     s = parse_seq_from_string(seq)
     assert len(s) > 0 and min(s) >= 1 and max(s) <= alphabet
     bordered = is_bordered(s)
     length = len(s)
-    click.echo(
-        f"[DEBUG] rank n={length} k={alphabet} bordered={bordered} seq={s} alg={alg}"
-    )
-    ranker = gen_ranker(alg)
-    res = ranker.rank(s, alphabet, bordered)
+    if debug:
+        click.echo(
+            f"[DEBUG] rank n={length} k={alphabet} bordered={bordered} seq={s} alg={alg}"
+        )
+    if approx:
+        from rank_unrank.batch import format_approx_rank
+
+        print(format_approx_rank(s, alphabet, bordered, eps))
+        return
+    with gen_ranker(alg) as ranker:
+        res = ranker.rank(s, alphabet, bordered)
     print(res)
 
 
@@ -48,14 +140,142 @@ def rank(alphabet, alg, seq):
 @click.option("-n", "--length", type=int, default=10)
 @click.option("-k", "--alphabet", type=int, default=2)
 @click.option("--bordered/--not-bordered", is_flag=True, default=True)
-@click.option("--alg", type=click.Choice(["base", "ub", "fast"]))
+@click.option("--alg", type=click.Choice(["base", "ub", "fast"]), default="fast")
+@batch_options
 @click.argument("R", type=int, default=1)
-def unrank(length, alphabet, bordered, alg, r):
-    click.echo(f"[DEBUG] unrank n={length} k={alphabet} bordered={bordered} alg={alg}")
-    ranker = gen_ranker(alg)
-    res = ranker.unrank(r, length, alphabet, bordered)
+@profile_option
+def unrank(
+    length, alphabet, bordered, alg, batch_mode, input_file, jobs, chunk_size, debug, r
+):
+    if debug is None:
+        debug = not batch_mode
+    if debug:
+        click.echo(
+            f"[DEBUG] unrank n={length} k={alphabet} bordered={bordered} alg={alg}"
+        )
+    if batch_mode:
+        from rank_unrank import batch
+
+        lines = batch.process(
+            batch.unrank_chunk,
+            input_file,
+            length,
+            alphabet,
+            bordered,
+            alg,
+            jobs=jobs,
+            chunk_size=chunk_size,
+        )
+        echo_lines(lines)
+        return
+    with gen_ranker(alg) as ranker:
+        res = ranker.unrank(r, length, alphabet, bordered)
     print(" ".join(map(str, res)))
 
 
+@cli.command()
+@click.option("-n", "--length", type=int, default=10)
+@click.option("-k", "--alphabet", type=int, default=2)
+@click.option("--bordered/--not-bordered", is_flag=True, default=True)
+@click.option("-c", "--count", type=int, default=1)
+@click.option("--seed", type=int)
+def sample(length, alphabet, bordered, count, seed):
+    """uniformly random words of the class, one per line"""
+    from rank_unrank import sampling
+
+    words = sampling.sample(length, alphabet, bordered, count, seed)
+    echo_lines(" ".join(map(str, w)) for w in words)
+
+
+@cli.command()
+@click.option("--host", type=str, default="127.0.0.1")
+@click.option("--port", type=int, default=8765)
+@click.option("--unix", "unix_path", type=str, help="listen on a Unix socket instead")
+@click.option("-j", "--workers", type=int, default=1)
+@click.option("--max-tables", type=int, default=32)
+@click.option(
+    "--max-line",
+    type=click.IntRange(min=1),
+    help="longest request line in bytes, server.MAX_LINE by default",
+)
+def serve(host, port, unix_path, workers, max_tables, max_line):
+    """JSON-lines rank/unrank server, see rank_unrank.server"""
+    from rank_unrank import server
+
+    server.serve(
+        host,
+        port,
+        unix_path,
+        workers,
+        max_tables,
+        on_ready=lambda address: click.echo(f"[DEBUG] serving on {address}"),
+        max_line=server.MAX_LINE if max_line is None else max_line,
+    )
+
+
+@cli.group("corpus")
+def corpus_group():
+    """binary corpora of words, see rank_unrank.corpus"""
+
+
+@corpus_group.command()
+@click.option("-n", "--length", type=int, required=True)
+@click.option("-k", "--alphabet", type=int, required=True)
+@click.option("-i", "--input", "input_file", type=click.File("r"), default="-")
+@click.argument("output", type=click.Path(dir_okay=False))
+def pack(length, alphabet, input_file, output):
+    """writes words (one per line of the input) as a binary corpus"""
+    from rank_unrank import corpus
+    from rank_unrank.batch import parse_seq
+
+    words = (parse_seq(line) for line in input_file if line.strip())
+    corpus.write_corpus(output, words, length, alphabet)
+
+
+@corpus_group.command("rank")
+@click.option("--alg", type=click.Choice(["base", "ub", "fast"]), default="fast")
+@click.option("-o", "--output", type=click.Path(dir_okay=False))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+def rank_corpus(alg, output, path):
+    """ranks every word of a corpus in its own class, into a binary ranks file
+    (or one rank per line, without --output)"""
+    from rank_unrank import corpus
+
+    with corpus.Corpus(path) as words:
+        records = corpus.rank_corpus(words, alg)
+        if output is None:
+            echo_lines(str(r) for _, r in records)
+        else:
+            corpus.write_ranks(output, records, words.n, words.k)
+
+
+def parse_range(s: str) -> range:
+    """range given as a, a-b or a-b:step (both ends inclusive)"""
+    bounds, _, step = s.partition(":")
+    first, _, last = bounds.partition("-")
+    return range(int(first), int(last or first) + 1, int(step or 1))
+
+
+@cli.group()
+def cache():
+    pass
+
+
+@cache.command()
+@click.option("-k", "--alphabet", "alphabets", type=str, default="2")
+@click.option("-n", "--length", "lengths", type=str, default="10")
+@click.option(
+    "--dir", "directory", type=str, envvar=tables.CACHE_DIR_ENV, required=True
+)
+@click.option("--max-bytes", type=int, default=tables.DEFAULT_MAX_BYTES)
+def prewarm(alphabets, lengths, directory, max_bytes):
+    """stores tables of all (k, n) in the given ranges, e.g. -k 2-4 -n 100-1000:100"""
+    tables.enable_cache(directory, max_bytes)
+    for k in parse_range(alphabets):
+        for n in parse_range(lengths):
+            click.echo(f"[DEBUG] prewarm k={k} n={n}")
+            tables.prewarm(k, n)
+
+
 if __name__ == "__main__":
     cli()
@@ -0,0 +1,97 @@
+import subprocess
+import sys
+
+import pytest
+from click.testing import CliRunner
+from rank_unrank import batch
+from rank_unrank.rank_fast import FasterRankerUnranker
+from rank_unrank.texts import is_bordered, random_word
+from rank_unrank.tool import cli
+
+
+def test_parse_seq():
+    assert batch.parse_seq("1 2,3 ,\t4\n") == (1, 2, 3, 4)
+    assert batch.parse_seq("  ") == ()
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_rank_unrank_batch(jobs):
+    ranker = FasterRankerUnranker()
+    words = [random_word(10, 3, seed=i) for i in range(50)]
+    lines = [",".join(map(str, w)) + "\n" for w in words]
+    lines.insert(7, "\n")
+    ranks = list(
+        batch.process(batch.rank_chunk, lines, 3, "fast", jobs=jobs, chunk_size=8)
+    )
+    assert ranks == [str(ranker.rank(w, 3, is_bordered(w))) for w in words]
+
+    bordered = [r for r, w in zip(ranks, words) if is_bordered(w)]
+    result = batch.process(
+        batch.unrank_chunk, bordered, 10, 3, True, "ub", jobs=jobs, chunk_size=8
+    )
+    expected = [" ".join(map(str, w)) for w in words if is_bordered(w)]
+    assert list(result) == expected
+
+
+def test_cli_batch():
+    runner = CliRunner()
+    result = runner.invoke(
+        cli, ["rank", "-k", "2", "--batch"], input="1 1 1\n1,2,1\n2 1\n"
+    )
+    assert result.exit_code == 0, result.output
+    assert result.output == "1\n2\n2\n"
+    result = runner.invoke(
+        cli, ["unrank", "-n", "3", "-k", "2", "--batch", "-j", "2"], input="1\n2\n"
+    )
+    assert result.exit_code == 0, result.output
+    assert result.output == "1 1 1\n1 2 1\n"
+    result = runner.invoke(cli, ["rank", "-k", "2", "1 2 1"])
+    assert result.output.startswith("[DEBUG]") and result.output.endswith("\n2\n")
+    result = runner.invoke(
+        cli, ["rank", "-k", "2", "--batch", "--chunk-size", "1"], input="2 1\n1 1\n"
+    )
+    assert result.exit_code == 0, result.output
+    assert result.output == "2\n1\n"
+    result = runner.invoke(
+        cli, ["rank", "-k", "2", "--batch", "--chunk-size", "0"], input="2 1\n"
+    )
+    assert result.exit_code == 2 and "--chunk-size" in result.output
+    with pytest.raises(ValueError):
+        list(batch.process(batch.rank_chunk, ["2 1\n"], 2, "fast", chunk_size=0))
+    for jobs in ("0", "-3"):
+        result = runner.invoke(
+            cli, ["rank", "-k", "2", "--batch", "-j", jobs], input="2 1\n"
+        )
+        assert result.exit_code == 2 and "--jobs" in result.output
+    with pytest.raises(ValueError):
+        list(batch.process(batch.rank_chunk, ["2 1\n"], 2, "fast", jobs=0))
+
+
+def test_lazy_imports():
+    # in a fresh interpreter, the CLI loads the ranker of --alg only
+    code = (
+        "import sys, rank_unrank.tool\n"
+        "print(sorted(m for m in sys.modules if m.startswith('rank_unrank.')))\n"
+        "rank_unrank.tool.gen_ranker('ub')\n"
+        "print('rank_unrank.rank_fast' in sys.modules)\n"
+        "print({'numpy', 'asyncio', 'multiprocessing'} & set(sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    )
+    assert result.stdout.splitlines() == [
+        "['rank_unrank.tables', 'rank_unrank.tool']",
+        "False",
+        "set()",
+    ]
+
+
+def test_package_getattr():
+    import rank_unrank
+
+    assert rank_unrank.FasterRankerUnranker is FasterRankerUnranker
+    assert rank_unrank.ranker_class("fast") is FasterRankerUnranker
+    assert rank_unrank.batch is batch
+    assert "count_table" in dir(rank_unrank)
+    with pytest.raises(AttributeError):
+        rank_unrank.no_such_name
@@ -0,0 +1,141 @@
+import pytest
+from click.testing import CliRunner
+from rank_unrank import corpus
+from rank_unrank.rank_fast import FasterRankerUnranker, WordTool
+from rank_unrank.texts import calc_pi, is_bordered, random_word
+from rank_unrank.tool import cli
+
+
+@pytest.mark.parametrize("k, itemsize", [(2, 1), (255, 1), (256, 2), (70000, 4)])
+def test_corpus_roundtrip(tmp_path, k, itemsize):
+    path = str(tmp_path / "words.bin")
+    words = [random_word(17, k, seed=i) for i in range(30)] + [(k,) * 17]
+    assert corpus.write_corpus(path, words, 17, k) == len(words)
+    with corpus.Corpus(path) as c:
+        assert (c.n, c.k, c.itemsize, len(c)) == (17, k, itemsize, len(words))
+        assert [tuple(w) for w in c] == words
+        assert tuple(c[5]) == words[5]
+        assert isinstance(c[5], memoryview)
+        with pytest.raises(IndexError):
+            c[len(words)]
+
+
+def test_corpus_errors(tmp_path):
+    path = str(tmp_path / "words.bin")
+    with pytest.raises(ValueError):
+        corpus.write_corpus(path, [(1, 2), (1, 3)], 2, 2)
+    with pytest.raises(ValueError):
+        corpus.write_corpus(path, [(1, 2, 1)], 2, 2)
+    corpus.write_corpus(path, [(1, 2)], 2, 2)
+    with open(path, "ab") as f:
+        f.write(b"\1")
+    with pytest.raises(corpus.CorpusFormatError):
+        corpus.Corpus(path)
+    with pytest.raises(corpus.CorpusFormatError):
+        corpus.Ranks(path)
+
+
+def test_exceptions_are_not_masked(tmp_path):
+    path = str(tmp_path / "words.bin")
+    with pytest.raises(KeyError):
+        with corpus.CorpusWriter(path, 2, 2) as writer:
+            writer.write((1, 2))
+            raise KeyError("interrupted")
+    with pytest.raises(corpus.CorpusFormatError):
+        corpus.Corpus(path)  # no header count, so never read as complete
+    corpus.write_corpus(path, [(1, 2), (2, 1)], 2, 2)
+    with pytest.raises(KeyError):
+        with corpus.Corpus(path) as c:
+            w = c[1]
+            raise KeyError(tuple(w))
+    with pytest.raises(BufferError):
+        with corpus.Corpus(path) as c:
+            w = c[1]
+    del w
+
+
+def test_words_are_not_copied(tmp_path):
+    path = str(tmp_path / "words.bin")
+    words = [random_word(40, 3, seed=i) for i in range(10)]
+    corpus.write_corpus(path, words, 40, 3)
+    c = corpus.Corpus(path)
+    w = c[7]
+    assert calc_pi(w) == calc_pi(words[7])
+    wt = WordTool(w, 3)
+    assert wt.seq is w
+    assert [wt.X(i) for i in range(41)] == [
+        WordTool(words[7], 3).X(i) for i in range(41)
+    ]
+    ranker = FasterRankerUnranker()
+    for bordered in (True, False):
+        assert ranker.rank(w, 3, bordered) == ranker.rank(words[7], 3, bordered)
+    wt.append(1)  # copied on the first modification
+    assert isinstance(wt.seq, list) and tuple(w) == words[7]
+    del w, wt
+    c.close()
+
+
+class IndexOnly:
+    """a word that fails if anything iterates (and so copies) it"""
+
+    def __init__(self, w):
+        self.w = w
+
+    def __len__(self):
+        return len(self.w)
+
+    def __getitem__(self, i):
+        if not isinstance(i, int):
+            raise AssertionError("word sliced")
+        return self.w[i]
+
+    def __iter__(self):
+        raise AssertionError("word copied")
+
+
+def test_rank_many_does_not_copy(tmp_path):
+    path = str(tmp_path / "words.bin")
+    words = [random_word(15, 300, seed=i % 7) for i in range(20)]
+    words += [w[:10] + (1,) * 5 for w in words[:5]]
+    corpus.write_corpus(path, words, 15, 300)
+    ranker = FasterRankerUnranker()
+    with corpus.Corpus(path) as c:
+        for bordered in (True, False):
+            expected = [ranker.rank(w, 300, bordered) for w in words]
+            assert ranker.rank_many(list(c), 300, bordered) == expected
+            wrapped = [IndexOnly(w) for w in words]
+            assert ranker.rank_many(wrapped, 300, bordered) == expected
+
+
+@pytest.mark.parametrize("alg", ["fast", "ub"])
+def test_rank_corpus(tmp_path, alg):
+    words = [random_word(12, 3, seed=i) for i in range(100)]
+    path, ranks_path = str(tmp_path / "words.bin"), str(tmp_path / "ranks.bin")
+    corpus.write_corpus(path, words, 12, 3)
+    ranker = FasterRankerUnranker()
+    expected = [(is_bordered(w), ranker.rank(w, 3, is_bordered(w))) for w in words]
+    with corpus.Corpus(path) as c:
+        records = corpus.rank_corpus(c, alg, chunk_size=16)
+        assert corpus.write_ranks(ranks_path, records, c.n, c.k) == len(words)
+    with corpus.Ranks(ranks_path) as ranks:
+        assert ranks.width == 3  # 3**12 < 2**24
+        assert list(ranks) == expected
+        assert ranks[3] == expected[3]
+
+
+def test_cli_corpus(tmp_path):
+    path, ranks_path = str(tmp_path / "words.bin"), str(tmp_path / "ranks.bin")
+    runner = CliRunner()
+    result = runner.invoke(
+        cli, ["corpus", "pack", "-n", "3", "-k", "2", path], input="1 2 1\n\n2,2,1\n"
+    )
+    assert result.exit_code == 0, result.output
+    result = runner.invoke(cli, ["corpus", "rank", path])
+    assert result.exit_code == 0, result.output
+    assert result.output == "2\n4\n"
+    result = runner.invoke(
+        cli, ["corpus", "rank", "--alg", "ub", path, "-o", ranks_path]
+    )
+    assert result.exit_code == 0, result.output
+    with corpus.Ranks(ranks_path) as ranks:
+        assert list(ranks) == [(True, 2), (False, 4)]
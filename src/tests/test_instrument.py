@@ -0,0 +1,35 @@
+import json
+from rank_unrank import instrument
+from rank_unrank.rank_fast import BEngine, FasterRankerUnranker
+from rank_unrank.rank_ub import UBRankerUnranker
+from rank_unrank.texts import random_word
+
+
+def test_profiled():
+    w = random_word(40, 2, seed=3)
+    original_B = BEngine.B
+    expected = (
+        FasterRankerUnranker().rank(w, 2, True),
+        UBRankerUnranker().rank(w, 2, True),
+    )
+    with instrument.profiled() as stats:
+        result = (
+            FasterRankerUnranker().rank(w, 2, True),
+            UBRankerUnranker().rank(w, 2, True),
+        )
+        FasterRankerUnranker().unrank(expected[0], 40, 2, True)
+    assert result == expected
+    assert BEngine.B is original_B
+    assert instrument.get_stats() is stats
+
+    d = json.loads(stats.json())
+    assert d["phases"]["fast.rank"]["calls"] == 1
+    assert d["phases"]["fast.rank"]["max_bits"] == expected[0].bit_length()
+    assert d["phases"]["ub.rank"]["max_bits"] == expected[1].bit_length()
+    assert d["phases"]["BEngine.B"]["calls"] > 0
+    assert d["phases"]["implicit_problem"]["calls"] == 40
+    # recursive calls are counted, but timed once
+    assert d["phases"]["ub.B"]["seconds"] <= d["phases"]["ub.rank"]["seconds"]
+    tables = d["caches"]["sum_a_tables"]
+    assert tables["hits"] + tables["misses"] > 0
+    assert "sum_queries" in stats.table()
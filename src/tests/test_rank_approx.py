@@ -0,0 +1,128 @@
+import itertools
+import math
+
+import pytest
+from click.testing import CliRunner
+from rank_unrank.rank_approx import approx_rank
+from rank_unrank.rank_fast import FasterRankerUnranker
+from rank_unrank.tables import count_table
+from rank_unrank.texts import fib_word, random_word
+from rank_unrank.tool import cli
+
+
+def exact_fraction(w, k, bordered):
+    total = count_table(k, len(w), bordered)[len(w)]
+    return (FasterRankerUnranker().rank(w, k, bordered) - 1) / total
+
+
+@pytest.mark.parametrize("n,k", [(8, 2), (5, 3)])
+def test_approx_rank_all_seq(n, k):
+    for w in itertools.product(range(1, k + 1), repeat=n):
+        for bordered in (True, False):
+            result = approx_rank(w, k, bordered)
+            exact = exact_fraction(w, k, bordered)
+            assert abs(result.fraction - exact) <= result.error * exact
+
+
+@pytest.mark.parametrize("eps", [0.1, 1e-4, 2**-40])
+@pytest.mark.parametrize("k", [2, 3, 26, 2**16])
+def test_approx_rank(eps, k):
+    for n in (2, 9, 40, 300):
+        words = [random_word(n, k, seed=s) for s in range(5)]
+        words += [(1,) * n, (k,) * n, (k,) + (1,) * (n - 1)]
+        words.append(tuple(min(c, k) for c in (fib_word(10) * 30)[:n]))
+        for w in words:
+            for bordered in (True, False):
+                result = approx_rank(w, k, bordered, eps)
+                assert result.error == eps
+                exact = exact_fraction(w, k, bordered)
+                assert abs(result.fraction - exact) <= eps * exact
+                if eps == 2**-40:
+                    rank = FasterRankerUnranker().rank(w, k, bordered)
+                    assert math.isclose(result.log2_rank, math.log2(rank), abs_tol=1e-9)
+
+
+def test_approx_rank_long_word():
+    # only the first letters are looked at, the exact rank has a million bits
+    w = random_word(10**6, 2, seed=1)
+    result = approx_rank(w, 2, True)
+    assert 0 <= result.fraction < 1
+    assert 10**6 - 4 < result.log2_rank < 10**6
+    prefix = w[:100]
+    assert approx_rank(
+        prefix + (1,) * (10**6 - 100), 2, True
+    ).fraction == pytest.approx(result.fraction, abs=2**-39)
+
+
+@pytest.mark.parametrize("k", [2, 3, 1000])
+@pytest.mark.parametrize("eps", [1e-6, 2**-40])
+def test_approx_rank_leading_ones(k, eps):
+    # tiny fractions, the bound is relative to them
+    ranker = FasterRankerUnranker()
+    for n, ones in [(200, 100), (200, 199), (300, 150), (600, 580)]:
+        for seed in range(3):
+            w = (1,) * ones + random_word(n - ones, k, seed=seed)
+            for bordered in (True, False):
+                result = approx_rank(w, k, bordered, eps)
+                rank = ranker.rank(w, k, bordered)
+                exact = exact_fraction(w, k, bordered)
+                assert abs(result.fraction - exact) <= eps * exact
+                assert math.isclose(
+                    result.log2_rank, math.log2(rank), abs_tol=2 * eps + 1e-9
+                )
+    # the example of the review: k=2, n=200, log2 rank about 98.24
+    w = (1,) * 100 + (2,) + (1,) * 98 + (2,)
+    rank = ranker.rank(w, 2, True)
+    assert approx_rank(w, 2, True, 1e-6).log2_rank == pytest.approx(
+        math.log2(rank), abs=1e-5
+    )
+
+
+def test_approx_rank_long_run_of_ones():
+    # 10^5 leading 1s, in near-linear time. The words below w = 1^s 2 1^(s-1)
+    # in either class are the 1^(s+1) z, with z ending in 1 (bordered) or in 2
+    # (unbordered), so both ranks are 2^(s-2) + 1
+    s = 10**5
+    w = (1,) * s + (2,) + (1,) * (s - 1)
+    for bordered in (True, False):
+        result = approx_rank(w, 2, bordered)
+        assert result.log2_rank == pytest.approx(s - 2, abs=1e-9)
+    # only 1^n is a smaller bordered word
+    result = approx_rank((1,) * (2 * s - 1) + (2,), 2, True)
+    assert result.log2_rank == pytest.approx(1.0, abs=1e-9)
+    assert approx_rank((1,) * (2 * s - 1) + (2,), 2, False).log2_rank == 0.0
+
+
+def test_approx_rank_underflow():
+    # the fraction is below the smallest float, log2_rank is still accurate
+    n = 3000
+    w = (1,) * (n - 2) + (2, 2)
+    rank = FasterRankerUnranker().rank(w, 2, False)
+    result = approx_rank(w, 2, False)
+    assert result.fraction == 0.0
+    assert result.log2_rank == pytest.approx(math.log2(rank), abs=1e-9)
+
+
+def test_approx_rank_errors():
+    assert approx_rank((1, 1, 1), 1, True).fraction == 0.0
+    with pytest.raises(ValueError):
+        approx_rank((1,), 2, True)
+    with pytest.raises(ValueError):
+        approx_rank((1, 1), 1, False)
+    with pytest.raises(ValueError):
+        approx_rank((1, 2), 2, True, eps=0.0)
+
+
+def test_cli_approx():
+    runner = CliRunner()
+    result = runner.invoke(cli, ["rank", "-k", "2", "--approx", "1,2,2,1,1,2,1"])
+    assert result.exit_code == 0, result.output
+    fraction, log2_rank = map(float, result.output.splitlines()[-1].split())
+    assert fraction == pytest.approx(32 / 88) and log2_rank == pytest.approx(
+        math.log2(33)
+    )
+    result = runner.invoke(
+        cli, ["rank", "-k", "2", "--batch", "--approx"], input="1 2 1\n2 1\n"
+    )
+    assert result.exit_code == 0, result.output
+    assert result.output == "0.25 1.0\n0.5 1.0\n"
@@ -2,11 +2,26 @@ from dataclasses import dataclass
 import itertools
 import pytest
 import random
-from rank_unrank.texts import is_bordered, calc_B_naive, random_word
-from rank_unrank.base import BaseRankerUnranker
+import sys
+from rank_unrank.texts import (
+    is_bordered,
+    calc_B_naive,
+    calc_U_naive,
+    random_word,
+    fib_word,
+)
+from rank_unrank.base import BaseRankerUnranker, SeqGenerator, PrunedSeqGenerator
+import rank_unrank.rank_fast
 import rank_unrank.rank_ub as ub
 from rank_unrank.rank_ub import UBRankerUnranker
-from rank_unrank.rank_fast import FasterRankerUnranker, WordTool
+from rank_unrank.rank_fast import (
+    FasterRankerUnranker,
+    WordTool,
+    BEngine,
+    count_completions,
+)
+from rank_unrank.rank_fast_subproblems import ArraySumQueries
+from rank_unrank.parallel import split_positions
 
 
 @dataclass
@@ -23,6 +38,8 @@ class SeqTest:
         (BaseRankerUnranker, 8, 2),
         (UBRankerUnranker, 12, 2),
         (FasterRankerUnranker, 12, 2),
+        (UBRankerUnranker, 6, 4),
+        (FasterRankerUnranker, 6, 4),
     ],
 )
 def test_rankers_on_all_seq(test_cls, n, k):
@@ -77,3 +94,212 @@ def test_calc_b(n, k):
             r = WordTool(u[:-1], k)
             result_r = r.B(m, u[-1], n)
             assert result_r == expected
+
+            r = WordTool(u[:-1], k, sum_queries=ArraySumQueries)
+            assert r.B(m, u[-1], n) == expected
+
+
+@pytest.mark.parametrize("k", [1, 2, 3])
+def test_count_completions(k):
+    lengths = list(range(9))
+    for m in range(5):
+        for u in itertools.product(range(1, k + 1), repeat=m):
+            result = count_completions(u, k, lengths[m:], True)
+            assert result == [calc_B_naive(u, k, n) for n in lengths[m:]]
+            result = count_completions(u, k, lengths[:m:-1], False)
+            assert result == [calc_U_naive(u, k, n) for n in lengths[:m:-1]]
+    assert count_completions((1, 2), k, [], True) == []
+    with pytest.raises(ValueError):
+        count_completions((1, 1), k, [3, 1], True)
+
+
+@pytest.mark.parametrize("n,k", [(40, 2), (25, 5)])
+def test_count_completions_against_ub(n, k):
+    # one U table for all the lengths against the UB saveB table
+    for seed in range(5):
+        u = random_word(12, k, seed=seed)
+        incremental = ub.IncrementalB(n, k)
+        for c in u[:-1]:
+            incremental.append(c)
+        lengths = range(12, n + 1)
+        expected = incremental.B_table(u[-1])[12:]
+        assert count_completions(u, k, lengths, True) == expected
+        expected = [k ** (length - 12) - b for length, b in zip(lengths, expected)]
+        assert count_completions(u, k, lengths, False) == expected
+
+
+@pytest.mark.parametrize("n,k", [(16, 2), (9, 3)])
+def test_incremental_b(n, k):
+    # against the original saveB tables, for all n at once (n >= 2p included)
+    for m in range(1, 8 if k == 2 else 5):
+        for u in itertools.product(range(1, k + 1), repeat=m):
+            w = [0] + list(u)
+            a, b = ub.populateBorderArrays(w, m)
+            for length in range(m, n + 1):
+                incremental = ub.IncrementalB(length, k)
+                for c in u[:-1]:
+                    incremental.append(c)
+                assert incremental.B(u[-1]) == ub.B(a, b, length, m, k)
+
+
+@pytest.mark.parametrize("n,k", [(7, 2), (4, 3), (3, 5)])
+def test_ub_against_original(n, k):
+    # the incremental rank and unrank against Gabric's, without the fast ranker
+    for seq in itertools.product(range(1, k + 1), repeat=n):
+        w = [0] + list(seq)
+        rank_b = ub.rankB_original(w, n, k)
+        rank_u = ub.rankU_original(w, n, k)
+        assert ub.rankB(w, n, k) == rank_b
+        assert ub.rankU(w, n, k) == rank_u
+        isB = is_bordered(seq)
+        rank = rank_b if isB else rank_u
+        assert ub.unrank(rank, n, k, isB) == seq
+        assert ub.unrank_original(rank, n, k, isB) == seq
+
+
+def test_select_char():
+    values, default_value = {2: 3, 5: 1}, 2
+    expected = [(1, 1), (2, 1), (1, 2), (2, 2), (3, 2), (1, 3), (2, 3)]
+    expected += [(1, 4), (2, 4), (1, 5), (1, 6), (2, 6)]
+    for rank, result in enumerate(expected, 1):
+        assert ub.selectChar(values, default_value, 6, rank) == result
+    assert ub.selectChar({1: 0, 2: 4}, None, 2, 3) == (3, 2)
+    assert ub.selectChar({}, 5, 2**32, 5 * 2**31 + 1) == (1, 2**31 + 1)
+    with pytest.raises(AssertionError):
+        ub.selectChar(values, default_value, 6, 13)
+
+
+@pytest.mark.parametrize("n,k", [(9, 2), (6, 3)])
+def test_b_engine(n, k):
+    for seq in itertools.product(range(1, k + 1), repeat=n - 1):
+        wt = WordTool(seq, k)
+        engine = BEngine(wt, n)
+        # positions in both directions, to move the coefficients up and down
+        for u_len in list(range(1, n + 1)) + list(range(n, 0, -1)):
+            for c in range(1, k + 1):
+                assert engine.B(u_len, c) == wt.B(u_len, c, n)
+                assert engine.U(u_len, c) == wt.U(u_len, c, n)
+
+
+@pytest.mark.parametrize(
+    "w,k",
+    [(random_word(1500, 2, seed=1500), 2), (fib_word(15), 2), ((1,) * 1500, 3)],
+)
+def test_fast_ranker_with_low_recursion_limit(w, k):
+    r = FasterRankerUnranker()
+    bordered = is_bordered(w)
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(100)
+    try:
+        rank = r.rank(w, k, bordered)
+        assert r.unrank(rank, len(w), k, bordered) == w
+    finally:
+        sys.setrecursionlimit(limit)
+
+
+@pytest.mark.parametrize("k,bordered", [(2, True), (2, False), (3, True), (5, False)])
+def test_rank_many(k, bordered):
+    random.seed(k * 10 + bordered)
+    prefixes = [random_word(random.randint(0, 12), k) for _ in range(5)]
+    words = []
+    for _ in range(200):
+        prefix = random.choice(prefixes)
+        words.append(prefix + random_word(random.randint(1, 6), k))
+    words += words[:20]  # duplicates
+    r = FasterRankerUnranker()
+    expected = [r.rank(w, k, bordered) for w in words]
+    assert r.rank_many(words, k, bordered) == expected
+    assert UBRankerUnranker().rank_many(words[:20], k, bordered) == expected[:20]
+
+
+@pytest.mark.parametrize(
+    "n,k,bordered", [(1, 2, False), (9, 2, True), (12, 2, False), (7, 3, True)]
+)
+def test_unrank_many(n, k, bordered):
+    random.seed(n * 10 + k + bordered)
+    r = FasterRankerUnranker()
+    total = sum(
+        1
+        for w in itertools.product(range(1, k + 1), repeat=n)
+        if is_bordered(w) == bordered
+    )
+    ranks = [random.randint(1, total) for _ in range(50)] + [1, total, 1]
+    random.shuffle(ranks)
+    expected = [r.unrank(rank, n, k, bordered) for rank in ranks]
+    assert r.unrank_many(ranks, n, k, bordered) == expected
+    assert r.unrank_many([], n, k, bordered) == []
+
+
+@pytest.mark.parametrize(
+    "n,k,bordered",
+    [(1, 3, False), (2, 2, True), (10, 2, True), (10, 2, False), (6, 3, True)],
+)
+def test_iter_from(n, k, bordered):
+    all_words = list(SeqGenerator(n, k, bordered))
+    r = FasterRankerUnranker()
+    assert list(r.iter_from(1, n, k, bordered)) == all_words
+    for start in (max(1, len(all_words) // 3), len(all_words)):
+        words = list(itertools.islice(r.iter_from(start, n, k, bordered), 20))
+        assert words == all_words[start - 1 : start + 19]
+    assert list(BaseRankerUnranker().iter_from(2, n, k, bordered)) == all_words[1:]
+
+
+@pytest.mark.parametrize("n,k", [(0, 2), (1, 2), (12, 2), (8, 3), (5, 4), (4, 1)])
+def test_pruned_seq_generator(n, k):
+    for bordered in (True, False):
+        expected = list(SeqGenerator(n, k, bordered))
+        assert list(PrunedSeqGenerator(n, k, bordered)) == expected
+
+
+def test_split_positions():
+    assert split_positions(0, 10, 3) == [(0, 4), (4, 7), (7, 10)]
+    assert split_positions(1, 3, 8) == [(1, 2), (2, 3)]
+    assert split_positions(0, 0, 4) == []
+    ranges = split_positions(0, 100, 4, cost=lambda i: min(i, 100 - i) + 1)
+    assert ranges[0][0] == 0 and ranges[-1][1] == 100
+    assert all(r1[1] == r2[0] for r1, r2 in zip(ranges, ranges[1:]))
+
+
+@pytest.mark.parametrize("test_cls", [UBRankerUnranker, FasterRankerUnranker])
+def test_parallel_rank(test_cls, monkeypatch):
+    monkeypatch.setattr(rank_unrank.rank_fast, "PARALLEL_MIN_LENGTH", 1)
+    monkeypatch.setattr(ub, "PARALLEL_MIN_LENGTH", 1)
+    n, k = 40, 3
+    r_seq = test_cls()
+    with test_cls(workers=2) as r_par:
+        for i in range(4):
+            w = random_word(n, k, seed=i)
+            for bordered in (True, False):
+                assert r_par.rank(w, k, bordered) == r_seq.rank(w, k, bordered)
+        assert r_par.pool._executor is not None
+    assert r_par.pool._executor is None
+
+
+@pytest.mark.parametrize("n,k", [(1, 2**32), (30, 2**16), (30, 2**32)])
+def test_large_alphabet(n, k):
+    r_ub = UBRankerUnranker()
+    r_fast = FasterRankerUnranker()
+    for i in range(4):
+        random.seed(i)
+        # few distinct letters, so that borders are frequent
+        letters = [random.randint(1, k) for _ in range(3)] + [1, k]
+        w = tuple(random.choice(letters) for _ in range(n))
+        for bordered in (True, False):
+            r = r_fast.rank(w, k, bordered)
+            assert r_ub.rank(w, k, bordered) == r
+            if is_bordered(w) == bordered:
+                assert r_fast.unrank(r, n, k, bordered) == w
+                assert r_ub.unrank(r, n, k, bordered) == w
+
+
+@pytest.mark.parametrize("n,k", [(1, 2), (2, 2), (50, 2), (120, 3), (40, 1000)])
+def test_modular_rank(n, k):
+    r = FasterRankerUnranker()
+    r_mod = FasterRankerUnranker(modular=True)
+    for i in range(3):
+        w = random_word(n, k, seed=i)
+        for bordered in (True, False):
+            expected = r.rank(w, k, bordered)
+            assert r_mod.rank(w, k, bordered) == expected
+            for p in (2, 1000003, 2**61 - 1):
+                assert r.rank_mod(w, k, bordered, p) == expected % p
@@ -0,0 +1,89 @@
+import itertools
+from collections import Counter
+
+import pytest
+from click.testing import CliRunner
+from rank_unrank import sampling
+from rank_unrank.texts import is_bordered
+from rank_unrank.tool import cli
+
+
+def test_bytes_bordered():
+    for n in range(1, 13):
+        for w in itertools.product((1, 2), repeat=n):
+            assert sampling._bytes_bordered(bytes(w)) == is_bordered(w), w
+            assert sampling._seq_bordered(list(w)) == is_bordered(w), w
+    for n in range(1, 8):
+        for w in itertools.product((1, 2, 3), repeat=n):
+            assert sampling._bytes_bordered(bytes(w)) == is_bordered(w), w
+
+
+@pytest.mark.parametrize("k", [2, 3, 26, 255, 256, 257, 1000, 70000, 2**32, 2**33])
+@pytest.mark.parametrize("bordered", [True, False])
+def test_sample_class(k, bordered):
+    for n in (2, 3, 17, 100):
+        words = sampling.sample(n, k, bordered, 50, seed=n)
+        assert len(words) == 50
+        for w in words:
+            assert isinstance(w, tuple) and len(w) == n
+            assert 1 <= min(w) and max(w) <= k
+            assert is_bordered(w) == bordered
+
+
+@pytest.mark.parametrize("n, k", [(5, 2), (6, 2), (4, 3)])
+@pytest.mark.parametrize("bordered", [True, False])
+def test_sample_uniform(n, k, bordered):
+    words = [
+        w
+        for w in itertools.product(range(1, k + 1), repeat=n)
+        if is_bordered(w) == bordered
+    ]
+    count = 300 * len(words)
+    freq = Counter(sampling.sample(n, k, bordered, count, seed=1))
+    assert set(freq) == set(words)
+    # each frequency is Binomial(count, 1 / len(words)), sd < sqrt(300)
+    for w in words:
+        assert abs(freq[w] - 300) < 6 * 300**0.5
+
+
+@pytest.mark.parametrize("k", [300, 65536, 2**31 + 1])
+def test_sample_wide_letters(k):
+    # letters decoded from 16 or 32-bit values are uniform over 1..k
+    letters = [w[0] for w in sampling.sample(1, k, False, 30000, seed=k)]
+    assert 1 <= min(letters) and max(letters) <= k
+    if k == 300:
+        freq = Counter(letters)
+        assert len(freq) == k
+        assert all(abs(f - 100) < 6 * 100**0.5 for f in freq.values())
+    for bound in (k // 3, k // 2):
+        below = sum(x <= bound for x in letters)
+        assert abs(below - 30000 * bound / k) < 6 * 30000**0.5
+
+
+def test_sample_seed():
+    for k in (2, 300):
+        for bordered in (True, False):
+            a = sampling.sample(40, k, bordered, 20, seed=7)
+            assert a == sampling.sample(40, k, bordered, 20, seed=7)
+            assert a != sampling.sample(40, k, bordered, 20, seed=8)
+
+
+def test_sample_empty_class():
+    assert all(len(w) == 1 for w in sampling.sample(1, 2, False, 3))
+    assert sampling.sample(3, 1, True, 2) == [(1, 1, 1)] * 2
+    assert sampling.sample(1, 1, False, 1) == [(1,)]
+    with pytest.raises(ValueError):
+        sampling.sample(1, 2, True, 1)
+    with pytest.raises(ValueError):
+        sampling.sample(2, 1, False, 1)
+
+
+def test_cli_sample():
+    runner = CliRunner()
+    args = ["sample", "-n", "12", "-k", "3", "-c", "5", "--seed", "3"]
+    result = runner.invoke(cli, args)
+    assert result.exit_code == 0, result.output
+    lines = result.output.splitlines()
+    assert len(lines) == 5
+    assert all(is_bordered(tuple(map(int, line.split()))) for line in lines)
+    assert runner.invoke(cli, args).output == result.output
@@ -0,0 +1,91 @@
+import threading
+import pytest
+from rank_unrank import server
+from rank_unrank.client import Client, ServerError
+from rank_unrank.rank_fast import FasterRankerUnranker
+from rank_unrank.texts import is_bordered, random_word
+
+
+def start_server(**kwargs):
+    ready = threading.Event()
+    addresses = []
+
+    def on_ready(address):
+        addresses.append(address)
+        ready.set()
+
+    thread = threading.Thread(
+        target=server.serve,
+        kwargs=dict(port=0, on_ready=on_ready, **kwargs),
+        daemon=True,
+    )
+    thread.start()
+    assert ready.wait(10)
+    return addresses[0]
+
+
+@pytest.fixture(scope="module")
+def address():
+    return start_server(workers=2)
+
+
+def test_handle_line():
+    assert server.handle_line(b'{"id": 7, "op": "rank", "k": 2, "seq": [1, 1]}') == (
+        b'{"id":7,"result":1}\n'
+    )
+    assert b'"error":"ValueError' in server.handle_line(
+        b'{"id": 8, "op": "rank", "k": 2, "seq": [1, 3]}'
+    )
+    assert b'"error"' in server.handle_line(b"not json")
+
+
+def test_server(address):
+    host, port = address[:2]
+    ranker = FasterRankerUnranker()
+    words = [random_word(12, 3, seed=i) for i in range(20)]
+    with Client(host, port) as c:
+        for w in words:
+            bordered = is_bordered(w)
+            assert c.rank(w, 3) == ranker.rank(w, 3, bordered)
+            r = ranker.rank(w, 3, bordered)
+            assert tuple(c.unrank(r, 12, 3, bordered)) == tuple(w)
+        bordered_words = [w for w in words if is_bordered(w)]
+        ranks = c.rank_many(bordered_words, 3, True)
+        assert ranks == ranker.rank_many(bordered_words, 3, True)
+        assert c.unrank_many(ranks, 12, 3, True) == [list(w) for w in bordered_words]
+        with pytest.raises(ServerError):
+            c.request("shuffle", k=2)
+        assert c.rank([2, 2], 2) == 2
+        assert c.count(12, 3, False) == 3**12 - c.count(12, 3, True) == 296208
+
+
+def test_server_pipelined(address):
+    host, port = address[:2]
+    with Client(host, port) as c:
+        lines = [
+            f'{{"id": {r}, "op": "unrank", "r": {r}, "n": 8, "k": 2, "bordered": true}}\n'
+            for r in range(1, 40)
+        ]
+        c.file.write("".join(lines).encode())
+        c.file.flush()
+        ranker = FasterRankerUnranker()
+        for r in range(1, 40):
+            response = c.file.readline()
+            assert response.startswith(f'{{"id":{r},'.encode())
+            assert str(list(ranker.unrank(r, 8, 2, True))).replace(
+                " ", ""
+            ).encode() in (response)
+
+
+def test_server_long_lines(address):
+    host, port = address[:2]
+    ranker = FasterRankerUnranker()
+    words = [random_word(40, 2, seed=i) for i in range(1000)]  # about 125 KB
+    with Client(host, port) as c:
+        assert c.rank_many(words, 2, True) == ranker.rank_many(words, 2, True)
+
+    host, port = start_server(workers=1, max_line=1000)[:2]
+    with Client(host, port) as c:
+        assert c.rank([1, 2, 1], 2) == 2
+        with pytest.raises(ServerError, match="limit"):
+            c.rank_many(words[:100], 2, True)
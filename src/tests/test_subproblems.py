@@ -2,7 +2,9 @@ import itertools
 import pytest
 import random
 from rank_unrank.texts import calc_a_b, calculate_all_periods_of_all_prefixes
+from rank_unrank.modular import crt, is_prime, primes_for_bound, word_primes
 from rank_unrank.rank_fast_subproblems import (
+    ArraySumQueries,
     SumQueries,
     NaiveSumQueries,
     implicit_problem,
@@ -18,9 +20,11 @@ def test_sum_queries(n, k):
 
         n_sq = NaiveSumQueries(a, b)
         sq = SumQueries(a, borders)
+        a_sq = ArraySumQueries(a, borders)
         for p, q in itertools.combinations(range(1, n + 1), r=2):
             for d in range(1, p):
                 assert n_sq.sum(p, q, d) == sq.sum(p, q, d)
+                assert n_sq.sum(p, q, d) == a_sq.sum(p, q, d)
 
 
 @pytest.mark.parametrize("k,values_count", [(80, 10), (100, 20), (500, 30)])
@@ -34,3 +38,24 @@ def test_implicit_problem(k, values_count):
         r = random.randint(1, sum(values.values()) + default_value * (k - values_count))
         kwargs = {"values": values, "default_value": default_value, "k": k, "r": r}
         assert implicit_problem_linear(**kwargs) == implicit_problem(**kwargs)
+
+
+def test_modular_primes_and_crt():
+    assert [p for p in range(100) if is_prime(p)] == [
+        2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47,
+        53, 59, 61, 67, 71, 73, 79, 83, 89, 97,
+    ]  # fmt: skip
+    primes = word_primes(4)
+    assert primes == sorted(primes, reverse=True)
+    assert all(is_prime(p) and p < 2**61 for p in primes)
+    for bits in (1, 60, 61, 500):
+        bound = 2**bits
+        product = 1
+        for p in primes_for_bound(bound):
+            product *= p
+        assert product > bound
+    random.seed(7)
+    for _ in range(20):
+        primes = primes_for_bound(2**300)
+        x = random.getrandbits(300)
+        assert crt([x % p for p in primes], primes) == x
@@ -0,0 +1,138 @@
+import os
+import pytest
+from rank_unrank import tables
+from rank_unrank.rank_fast import FasterRankerUnranker
+from rank_unrank.texts import calc_B_naive, calc_U_naive, random_word
+
+
+def test_table_roundtrip(tmp_path):
+    values = [0, 1, -1, 127, 128, -128, -129, 2**1000 + 7, -(3**500), 255]
+    path = str(tmp_path / "t.tbl")
+    tables.write_table(path, "test", 3, 17, values)
+    table = tables.LazyIntTable(path)
+    assert (table.kind, table.k, table.n, len(table)) == ("test", 3, 17, len(values))
+    assert table[7] == 2**1000 + 7
+    assert list(table) == values
+    with pytest.raises(IndexError):
+        table[len(values)]
+    table.close()
+
+    with open(path, "r+b") as f:
+        f.write(b"XXXX")
+    with pytest.raises(tables.TableFormatError):
+        tables.LazyIntTable(path)
+
+
+def test_cache_lru_eviction(tmp_path):
+    cache = tables.TableCache(str(tmp_path), max_bytes=10**9)
+    for n in range(10, 15):
+        cache.put("unbordered", 2, n, tables.compute_unbordered_counts(2, n))
+        os.utime(cache.path("unbordered", 2, n), (n, n))
+    assert list(cache.get("unbordered", 2, 12)) == tables.compute_unbordered_counts(
+        2, 12
+    )
+    size = os.path.getsize(cache.path("unbordered", 2, 14))
+    cache.max_bytes = 2 * size + 1
+    cache.evict()
+    # 12 was used most recently, 14 was written last
+    assert sorted(os.listdir(tmp_path)) == [
+        "unbordered-k2-n12.v1.tbl",
+        "unbordered-k2-n14.v1.tbl",
+    ]
+    assert cache.get("unbordered", 2, 10) is None
+
+
+@pytest.mark.parametrize("k", [2, 3])
+def test_unbordered_counts(k):
+    counts = tables.compute_unbordered_counts(k, 8)
+    assert counts == [calc_U_naive((), k, n) for n in range(9)]
+
+
+@pytest.mark.parametrize("k", [1, 2, 3])
+def test_count_table(k):
+    for N in (3, 0, 8, 5):  # extended, then sliced
+        assert tables.count_table(k, N, False) == [
+            calc_U_naive((), k, n) for n in range(N + 1)
+        ]
+        assert tables.count_table(k, N, True) == [
+            calc_B_naive((), k, n) for n in range(N + 1)
+        ]
+    table = tables.count_table(k, 300, True)
+    table[5] = -1
+    assert tables.count_table(k, 300, True)[5] != -1
+    U = tables.count_table(k, 300, False)
+    assert all(b + u == k**n for n, (b, u) in enumerate(zip(table[6:], U[6:]), 6))
+
+
+def test_count_table_eviction():
+    for k in range(2, 4 + tables.COUNT_TABLES_MAX):
+        tables.count_table(k, 10, True)
+        tables.count_table(2, 10, True)  # used most recently
+    assert len(tables._count_tables) == tables.COUNT_TABLES_MAX
+    assert 2 in tables._count_tables and 3 not in tables._count_tables
+    assert tables.count_table(3, 10, False) == [
+        calc_U_naive((), 3, n) for n in range(11)
+    ]
+
+
+def test_rank_with_cache(tmp_path):
+    r = FasterRankerUnranker()
+    words = [random_word(n, k, seed=n) for n, k in [(1, 2), (2, 2), (60, 2), (45, 3)]]
+    expected = [
+        (r.rank(w, k, True), r.rank(w, k, False)) for w, k in zip(words, [2, 2, 2, 3])
+    ]
+    tables.enable_cache(str(tmp_path))
+    try:
+        for _ in range(2):  # computed, then loaded
+            result = [
+                (r.rank(w, k, True), r.rank(w, k, False))
+                for w, k in zip(words, [2, 2, 2, 3])
+            ]
+            assert result == expected
+        assert "coef-k2-n60.v1.tbl" in os.listdir(tmp_path)
+    finally:
+        tables.disable_cache()
+
+
+def test_memory_cache():
+    expected = FasterRankerUnranker().unrank(5, 30, 2, True)
+    tables.enable_memory_cache(2)
+    try:
+        coef = tables.coefficients(2, 30)
+        assert coef == tables.compute_coefficients(2, 30)
+        coef[5] += 1  # callers get their own copies
+        assert tables.coefficients(2, 30) == tables.compute_coefficients(2, 30)
+        tables.unbordered_counts(2, 30)
+        tables.unbordered_counts(3, 30)
+        assert list(tables._memory) == [("unbordered", 2, 30), ("unbordered", 3, 30)]
+        for _ in range(2):
+            assert FasterRankerUnranker().unrank(5, 30, 2, True) == expected
+    finally:
+        tables.disable_memory_cache()
+    assert tables.coefficients(2, 30) is None
+
+
+def test_cache_load_is_lazy(tmp_path):
+    cache = tables.TableCache(str(tmp_path), max_open=1)
+    expected = tables.compute_coefficients(2, 40)
+    assert cache.load("coef", 2, 40, tables.compute_coefficients) == expected
+    table = cache.load("coef", 2, 40, tables.compute_coefficients)
+    assert isinstance(table, tables.LazyIntTable)
+    assert table[7] == expected[7] and list(table) == expected
+    cache.load("coef", 2, 41, tables.compute_coefficients)  # evicts 40 from opened
+    assert list(table) == expected  # the view stays valid
+
+
+@pytest.mark.parametrize("damage", ["empty", "header", "offsets", "data"])
+def test_cache_rebuilds_broken_files(tmp_path, damage):
+    cache = tables.TableCache(str(tmp_path))
+    expected = tables.compute_unbordered_counts(3, 20)
+    cache.put("unbordered", 3, 20, expected)
+    path = cache.path("unbordered", 3, 20)
+    size = {"empty": 0, "header": 10, "offsets": tables.HEADER.size + 4}
+    with open(path, "r+b") as f:
+        f.truncate(size.get(damage, os.path.getsize(path) - 1))
+    assert cache.get("unbordered", 3, 20) is None
+    result = cache.load("unbordered", 3, 20, tables.compute_unbordered_counts)
+    assert list(result) == expected
+    assert list(cache.get("unbordered", 3, 20)) == expected
@@ -8,7 +8,10 @@ from rank_unrank.texts import (
     calc_X_naive,
     calc_a_b_naive,
     calc_a_b,
+    calculate_all_periods_single_step,
     ArithSequence,
+    PeriodsGroup,
+    PeriodsTable,
 )
 from rank_unrank.rank_ub import populateBorderArrays
 from rank_unrank.rank_fast import WordTool
@@ -77,6 +80,27 @@ def test_all_periods_of_prefixes_on_all_binary_seq():
         assert len(seq_periods) == len(expected_answer)
 
 
+@pytest.mark.parametrize("n,k", [(9, 2), (6, 3)])
+def test_periods_table(n, k):
+    for seq in itertools.product(range(1, k + 1), repeat=n):
+        groups = [PeriodsGroup([])]
+        for i in range(1, n + 1):
+            groups.append(
+                calculate_all_periods_single_step(seq, i - 1, seq[i - 1], groups[-1])
+            )
+        table = PeriodsTable(seq)
+        assert list(table) == groups
+        assert [table.count(i) for i in range(n + 1)] == [
+            len(g.periods) for g in groups
+        ]
+        table.pop()
+        table.pop()
+        assert table == PeriodsTable(seq[:-2])
+        table.append(seq, seq[-2])
+        assert table[-1] == groups[-2]
+    assert not hasattr(ArithSequence(1, 2, 1), "__dict__")
+
+
 @pytest.mark.parametrize(
     "seq,k,expected_answer",
     [
@@ -109,3 +133,15 @@ def test_calc_a_b(n, k):
         a2, b2 = populateBorderArrays(w, n)
         assert expected_a == a2
         assert expected_b == b2
+
+
+@pytest.mark.parametrize("n,k", [(8, 2), (6, 3)])
+def test_word_tool_append(n, k):
+    for seq in itertools.product(range(1, k + 1), repeat=n):
+        wt = WordTool([], k)
+        for c in seq:
+            wt.append(c)
+        expected = WordTool(seq, k)
+        assert wt.seq == expected.seq
+        assert wt.periods == expected.periods
+        assert [wt.X(i) for i in range(n + 1)] == [expected.X(i) for i in range(n + 1)]
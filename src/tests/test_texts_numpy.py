@@ -0,0 +1,37 @@
+import itertools
+import pytest
+from rank_unrank.texts import calc_a_b, calc_pi, is_bordered, random_word
+
+np = pytest.importorskip("numpy")
+from rank_unrank.texts_numpy import (  # noqa: E402
+    calc_a_b_batch,
+    calc_pi_batch,
+    is_bordered_batch,
+)
+
+
+@pytest.mark.parametrize("n,k", [(1, 2), (8, 2), (6, 3), (5, 4)])
+def test_batch_on_all_seq(n, k):
+    words = list(itertools.product(range(1, k + 1), repeat=n))
+    arr = np.array(words, dtype=np.uint8)
+    pi = calc_pi_batch(arr)
+    a, b = calc_a_b_batch(arr)
+    bordered = is_bordered_batch(arr, chunk_size=7)
+    for r, w in enumerate(words):
+        assert list(pi[r]) == calc_pi(w)
+        expected_a, expected_b = calc_a_b(w)
+        assert list(a[r]) == expected_a
+        assert list(b[r]) == expected_b
+        assert bordered[r] == is_bordered(w)
+
+
+@pytest.mark.parametrize("n,k", [(40, 2), (101, 3)])
+def test_batch_on_random_seq(n, k):
+    words = [random_word(n, k, seed=i) for i in range(200)]
+    words += [(1,) * n, (1, 2) * (n // 2) + (1,) * (n % 2)]
+    arr = np.array(words, dtype=np.int64)
+    pi = calc_pi_batch(arr)
+    bordered = is_bordered_batch(arr)
+    for r, w in enumerate(words):
+        assert list(pi[r]) == calc_pi(w)
+        assert bordered[r] == is_bordered(w)